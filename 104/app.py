@@ -1,19 +1,21 @@
 import pandas as pd
-from utils import connect_db, jobs_detail_project, display_job_grid, jobs_condition
+from utils import enable_copy_on_write, connect_db, ensure_indexes, find_jobs_view, load_cached_frame, display_job_grid
 
-# 連線資料庫、選擇要使用的資料庫與集合
+# 篩選出的 DataFrame 與共用資料共享記憶體，不會整份複製
+enable_copy_on_write()
+
+# 連線資料庫、選擇要使用的資料庫
 client = connect_db()
 db = client["104"]
-collection = db["jobs_detail"]
-
-# mongodb pipeline
-project = jobs_detail_project() # 顯示 jobs_detail 中所需欄位
-condition = jobs_condition() # 篩選掉我不想要的職務 title
-sort = { '$sort': {'company': -1} }
-pipeline = [project, condition, sort]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
 
-# 執行 Aggregation Pipeline
-filtered_data = pd.DataFrame(pd.DataFrame(collection.aggregate(pipeline, allowDiskUse=True))).copy()
+# 讀取 ingest 時預先計算好的 jobs_view（已投影欄位、篩選掉不想要的職務並建立索引），
+# 所有使用者共用同一份 DataFrame，只有爬蟲寫入新資料後才重新載入；有同一版本的 snapshot 時直接 memory-map 讀取，
+# 並在載入時建立搜尋索引
+filtered_data = load_cached_frame(
+    db, "jobs_view", lambda db: pd.DataFrame(list(find_jobs_view(db))),
+    snapshot=True, compact=True, search_index=True
+)
 
 # 使用 streamlit run 顯示資料
 display_job_grid(filtered_data, title="AI相關職缺")
\ No newline at end of file
@@ -0,0 +1,18 @@
+# 自建模組
+from utils import backfill_salaries, refresh_jobs_view, bump_ingest_generation, export_snapshots, connect_db, ensure_indexes
+
+# 連線資料庫、選擇要使用的資料庫與集合
+client = connect_db()
+db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
+
+# 為既有的職缺詳情解析薪資（調整 SALARY_* 工時假設後也需要重新執行）
+stats = backfill_salaries(db["jobs_detail"])
+print(f"檢查 {stats['scanned']} 筆職缺詳情，更新 {stats['changed']} 筆薪資")
+
+# jobs_view 的 annualSalary 來自解析結果，需要重新產生
+if stats["changed"]:
+    print(f"jobs_view 已更新，共 {refresh_jobs_view(db)} 筆職缺")
+    generation = bump_ingest_generation(db)
+    print(f"資料版本 {generation}")
+    export_snapshots(db, generation) # 寫出 app 啟動時 memory-map 讀取的 snapshot
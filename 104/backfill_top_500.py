@@ -0,0 +1,17 @@
+# 自建模組
+from utils import backfill_company_tags, bump_ingest_generation, export_snapshots, connect_db, ensure_indexes
+
+# 連線資料庫、選擇要使用的資料庫與集合
+client = connect_db()
+db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
+
+# 為既有的職缺詳情標記前五百大企業（taiwan_500.csv 或比對規則更新後也需要重新執行，會移除不再符合的標記）
+stats = backfill_company_tags(db["jobs_detail"])
+print(f"檢查 {stats['scanned']} 筆職缺詳情，{stats['tagged']} 筆屬於前五百大企業，更新 {stats['changed']} 筆標記")
+
+# 讓 top_500 頁面重新載入資料
+if stats["changed"]:
+    generation = bump_ingest_generation(db)
+    print(f"資料版本 {generation}")
+    export_snapshots(db, generation)
@@ -0,0 +1,165 @@
+import time
+import random
+import argparse
+
+# 自建模組
+from utils import connect_db, parse_salaries
+
+parser = argparse.ArgumentParser(description="比較 Python 批次解析薪資與原本 aggregation 換算年薪的速度")
+parser.add_argument("--count", type=int, default=50000, help="產生的測試職缺數")
+parser.add_argument("--no-db", action="store_true", help="只測 Python 解析，不連線 MongoDB")
+args = parser.parse_args()
+
+# 原本 jobs_detail_project() 中的 annualSalary 運算式
+LEGACY_ANNUAL_SALARY = {
+    '$switch': {
+        'branches': [
+            {
+                'case': { '$eq': ['$jobDetail.salaryType', 10] },
+                'then': 0
+            },
+            {
+                'case': { '$eq': ['$jobDetail.salaryType', 50] },
+                'then': {
+                    '$let': {
+                        'vars': {
+                            'cleaned': {
+                                '$reduce': {
+                                    'input': ['月薪', '元以上', '元', ','],
+                                    'initialValue': '$jobDetail.salary',
+                                    'in': {
+                                        '$replaceAll': {
+                                            'input': '$$value',
+                                            'find': '$$this',
+                                            'replacement': ''
+                                        }
+                                    }
+                                }
+                            }
+                        },
+                        'in': {
+                            '$multiply': [
+                                {
+                                    '$let': {
+                                        'vars': {
+                                            'parts': { '$split': ['$$cleaned', '~'] }
+                                        },
+                                        'in': {
+                                            '$cond': [
+                                                { '$gt': [{ '$size': '$$parts' }, 1] },
+                                                {
+                                                    '$avg': {
+                                                        '$map': {
+                                                            'input': '$$parts',
+                                                            'as': 'p',
+                                                            'in': { '$toDouble': '$$p' }
+                                                        }
+                                                    }
+                                                },
+                                                { '$toDouble': { '$arrayElemAt': ['$$parts', 0] } }
+                                            ]
+                                        }
+                                    }
+                                },
+                                12
+                            ]
+                        }
+                    }
+                }
+            },
+            {
+                'case': { '$eq': ['$jobDetail.salaryType', 60] },
+                'then': {
+                    '$let': {
+                        'vars': {
+                            'cleaned': {
+                                '$reduce': {
+                                    'input': ['年薪', '元以上', '元', ','],
+                                    'initialValue': '$jobDetail.salary',
+                                    'in': {
+                                        '$replaceAll': {
+                                            'input': '$$value',
+                                            'find': '$$this',
+                                            'replacement': ''
+                                        }
+                                    }
+                                }
+                            }
+                        },
+                        'in': {
+                            '$let': {
+                                'vars': {
+                                    'parts': { '$split': ['$$cleaned', '~'] }
+                                },
+                                'in': {
+                                    '$cond': [
+                                        { '$gt': [{ '$size': '$$parts' }, 1] },
+                                        {
+                                            '$avg': {
+                                                '$map': {
+                                                    'input': '$$parts',
+                                                    'as': 'p',
+                                                    'in': { '$toDouble': '$$p' }
+                                                }
+                                            }
+                                        },
+                                        { '$toDouble': { '$arrayElemAt': ['$$parts', 0] } }
+                                    ]
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        ],
+        'default': None
+    }
+}
+
+def sample_salaries(count):
+    """
+    產生各種計薪方式的薪資文字，格式與 104 的 jobDetail.salary 相同。
+    """
+    random.seed(0)
+    samples = []
+    for _ in range(count):
+        kind = random.choice([10, 50, 50, 50, 60, "時薪", "日薪"])
+        low = random.randrange(30, 90) * 1000
+        if kind == 10:
+            samples.append(("待遇面議", 10))
+        elif kind == 50:
+            samples.append((random.choice([f"月薪{low:,}~{low + 20000:,}元", f"月薪{low:,}元以上"]), 50))
+        elif kind == 60:
+            samples.append((f"年薪{low * 14:,}~{low * 18:,}元", 60))
+        elif kind == "時薪":
+            samples.append((f"時薪{random.randrange(183, 300)}元", 30))
+        else:
+            samples.append((f"日薪{random.randrange(1500, 3000):,}元", 40))
+    return samples
+
+samples = sample_salaries(args.count)
+
+start = time.perf_counter()
+parsed = parse_salaries([salary for salary, _ in samples], [salary_type for _, salary_type in samples])
+python_seconds = time.perf_counter() - start
+print(f"Python 批次解析 {len(samples)} 筆：{python_seconds:.3f} 秒")
+
+if not args.no_db:
+    client = connect_db()
+    collection = client["104"]["benchmark_salary"]
+    collection.drop()
+    collection.insert_many([
+        {"_id": i, "jobDetail": {"salary": salary, "salaryType": salary_type}}
+        for i, (salary, salary_type) in enumerate(samples)
+    ])
+    try:
+        start = time.perf_counter()
+        legacy = list(collection.aggregate([{"$project": {"annualSalary": LEGACY_ANNUAL_SALARY}}, {"$sort": {"_id": 1}}]))
+        mongo_seconds = time.perf_counter() - start
+        print(f"aggregation 換算 {len(legacy)} 筆：{mongo_seconds:.3f} 秒（每次讀取都要重新計算）")
+
+        # 比較兩種結果，月薪、年薪應一致，其餘為原本無法換算的薪資
+        same = sum(1 for doc, result in zip(legacy, parsed) if doc.get("annualSalary") == result["annual"])
+        print(f"結果相同 {same} 筆，不同 {len(samples) - same} 筆（時薪、日薪原本為 null）")
+    finally:
+        collection.drop()
@@ -0,0 +1,37 @@
+import time
+import argparse
+
+# 自建模組
+from utils import (DetailQueue, run_queue_worker, refresh_jobs_view, bump_ingest_generation, export_snapshots,
+                   connect_db, mongo_pool_stats, ensure_indexes, get_rate_limiter, get_http_client)
+
+parser = argparse.ArgumentParser(description="從 detail_queue 領取職缺並爬取詳情，可同時啟動多個 worker")
+parser.add_argument("--worker-id", default=None, help="worker 名稱，預設為 主機名稱-PID")
+parser.add_argument("--threads", type=int, default=5, help="每個 worker 同時爬取的執行緒數")
+parser.add_argument("--lease", type=int, default=300, help="領取項目的租約秒數")
+parser.add_argument("--max-attempts", type=int, default=3, help="每個項目最多嘗試次數")
+parser.add_argument("--wait", type=int, default=0, help="佇列清空後每隔幾秒再檢查一次，0 表示直接結束")
+args = parser.parse_args()
+
+# 連線資料庫、選擇要使用的資料庫與集合
+client = connect_db()
+db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
+detail_collection = db["jobs_detail"]
+queue = DetailQueue(db["detail_queue"], lease_seconds=args.lease, max_attempts=args.max_attempts)
+
+while True:
+    stats = run_queue_worker(queue, detail_collection, worker_id=args.worker_id, max_workers=args.threads)
+    print(f"[{stats['worker']}] 爬取 {stats['fetched']} 筆，成功儲存 {stats['written']} 筆職缺詳情")
+    if stats["written"]:
+        print(f"jobs_view 已更新，共 {refresh_jobs_view(db)} 筆職缺")
+        generation = bump_ingest_generation(db)
+        print(f"資料版本 {generation}")
+        export_snapshots(db, generation) # 寫出 app 啟動時 memory-map 讀取的 snapshot
+    if not args.wait:
+        break
+    time.sleep(args.wait)
+
+print(f"限流器統計：{get_rate_limiter().metrics()}")
+print(f"連線池統計：{get_http_client().pool_stats()}")
+print(f"MongoDB 連線池統計：{mongo_pool_stats()}")
\ No newline at end of file
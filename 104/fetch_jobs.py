@@ -1,9 +1,18 @@
+import argparse
+
 # 自建模組
-from utils import list_jobs, connect_db
+from utils import (list_jobs_concurrently, sync_jobs_resumable, CrawlCheckpoint, connect_db, mongo_pool_stats,
+                   ensure_indexes, get_rate_limiter, get_http_client)
+
+parser = argparse.ArgumentParser(description="爬取 104 職缺列表並同步到 jobs 集合")
+parser.add_argument("--replace", action="store_true", help="清空 jobs 集合後重新寫入，而非增量同步")
+parser.add_argument("--restart", action="store_true", help="忽略上次未完成的進度，從頭開始爬取")
+args = parser.parse_args()
 
 # 資料庫
 client = connect_db()
 db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
 collection = db["jobs"]
 
 # 地區
@@ -44,8 +53,19 @@ areas = {
     "6001006014": "新竹峨眉",
 }
 
-# 取得 jobs list
-all_jobs = list_jobs(areas)
-collection.delete_many({})
-collection.insert_many(all_jobs)
-print(f"成功新增 {len(all_jobs)} 筆職缺資料")
\ No newline at end of file
+if args.replace:
+    # 取得 jobs list 後整批取代
+    all_jobs = list_jobs_concurrently(areas, max_concurrency=8, per_host_limit=4)
+    collection.delete_many({})
+    collection.insert_many(all_jobs)
+    print(f"成功新增 {len(all_jobs)} 筆職缺資料")
+else:
+    # 每個分頁爬完就寫入 jobs，進度記錄在 crawl_state，中斷後可接續
+    checkpoint = CrawlCheckpoint(db["crawl_state"], "fetch_jobs")
+    counts = sync_jobs_resumable(collection, areas, checkpoint, resume=not args.restart,
+                                 max_concurrency=8, per_host_limit=4)
+    print(f"同步職缺資料：新增 {counts['inserted']} 筆、更新 {counts['updated']} 筆、"
+          f"未變動 {counts['unchanged']} 筆、關閉 {counts['closed']} 筆")
+print(f"限流器統計：{get_rate_limiter().metrics()}")
+print(f"連線池統計：{get_http_client().pool_stats()}")
+print(f"MongoDB 連線池統計：{mongo_pool_stats()}")
\ No newline at end of file
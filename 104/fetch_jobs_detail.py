@@ -1,62 +1,54 @@
-import json
-import time
+import argparse
 
 # 自建模組
-from utils import multi_thread_get_jobs, connect_db
+from utils import (run_queue_worker, find_stale_jobs, reconcile_closed_details, DetailQueue, refresh_jobs_view,
+                   bump_ingest_generation, export_snapshots, connect_db, mongo_pool_stats, ensure_indexes,
+                   get_rate_limiter, get_http_client)
+
+parser = argparse.ArgumentParser(description="爬取 jobs 集合中職缺的詳情並寫入 jobs_detail 集合")
+parser.add_argument("--ttl-days", type=float, default=None, help="詳情超過幾天就強制重新爬取，預設只依列表指紋判斷")
+parser.add_argument("--restart", action="store_true", help="忽略上次未完成的佇列，重新計算需要爬取的職缺")
+parser.add_argument("--enqueue-only", action="store_true", help="只將需要爬取的職缺放進佇列，交給 detail_worker.py 處理")
+args = parser.parse_args()
 
 # 連線資料庫、選擇要使用的資料庫與集合
 client = connect_db()
 db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
 jobs_collection = db["jobs"]
 detail_collection = db["jobs_detail"]
 
-# 取得爬下的所有職缺列表
-documents = jobs_collection.find({})
-job_urls = [doc["_id"] for doc in documents]
-
-# 從職缺詳情中刪除已經關閉的職缺資料
-result = detail_collection.delete_many({"_id": {"$nin": job_urls}})
-print(f"刪除 {result.deleted_count} 筆已關閉的職缺詳情")
-
-# 找到未爬取的職缺 URL
-fetched_urls = [doc["_id"] for doc in detail_collection.find({}, {"_id": 1})]
-remaining_urls = set(job_urls) - set(fetched_urls)
-
-# remaining_urls 是頁面 URL，要轉成 ajax URL 來爬取職缺詳情
-job_ajax_urls = []
-for url in remaining_urls:
-    job_id = url.rstrip("/").split("/")[-1]
-    ajax_url = f"https://www.104.com.tw/job/ajax/content/{job_id}"
-    job_ajax_urls.append(ajax_url)
-
-# 分批爬取尚未爬取過的 job_ajax_urls
-batch_size = 50
-for i in range(0, len(job_ajax_urls), batch_size):
-    batch_urls = job_ajax_urls[i:i + batch_size]
-    print(f"處理批次 {(i // batch_size) + 1}/{(len(job_ajax_urls) + batch_size - 1) // batch_size}")
-
-    # 使用 multi_thread_get_jobs 處理這一批次
-    data_results = multi_thread_get_jobs(batch_urls)
-
-    # 將每個 URL 與對應的資料存入 MongoDB，並以 URL 作為主鍵 (_id)
-    for url, data in data_results.items():
-        try:
-            job_detail = json.loads(data)
-        except json.JSONDecodeError as e:
-            print(f"解析 {url} 的 JSON 時發生錯誤：{e}")
-            continue
-
-        job_detail = job_detail["data"]
-        job_detail["_id"] = url
-        try:
-            detail_collection.insert_one(job_detail)
-            print(f"儲存 {url} 文件成功")
-            print(f"公司：{job_detail['header']['custName']}")
-            print(f"人數：{job_detail['employees']}")
-            print(f"薪資：{job_detail['jobDetail']['salary']}")
-            print(f"職缺：{job_detail['header']['jobName']}")
-            print("==============================================")
-        except Exception as e:
-            print(f"儲存 {url} 文件時發生錯誤：{e}")
-
-    time.sleep(3)
\ No newline at end of file
+# 從職缺詳情中刪除已經關閉的職缺資料（依 _id 合併比對 jobs 與 jobs_detail，分批刪除）
+deleted = reconcile_closed_details(jobs_collection, detail_collection)
+print(f"刪除 {deleted} 筆已關閉的職缺詳情")
+
+# 佇列中上次未完成的職缺會接續處理，並一併加入這次需要爬取的職缺
+queue = DetailQueue(db["detail_queue"])
+if args.restart:
+    queue.reset()
+remaining = queue.active_count()
+if remaining:
+    print(f"接續上次未完成的佇列，剩餘 {remaining} 筆")
+# 找到未爬取、列表資料有變動或超過 TTL 的職缺 URL，已在佇列中的會被略過
+queue.clear_finished()
+enqueued = queue.enqueue(find_stale_jobs(jobs_collection, detail_collection, ttl_days=args.ttl_days))
+print(f"共有 {enqueued} 筆職缺詳情需要爬取")
+
+if args.enqueue_only:
+    print("已放進 detail_queue，請以 detail_worker.py 處理")
+else:
+    # 本機也當作一個 worker，串流爬取職缺詳情並持續批次寫入 MongoDB，以 URL 作為主鍵 (_id)
+    stats = run_queue_worker(queue, detail_collection, max_workers=5)
+    print(f"爬取 {stats['fetched']} 筆，成功儲存 {stats['written']} 筆職缺詳情")
+    if not queue.active_count():
+        queue.clear_finished()
+
+# 更新 app 讀取的 jobs_view
+print(f"jobs_view 已更新，共 {refresh_jobs_view(db)} 筆職缺")
+generation = bump_ingest_generation(db)
+print(f"資料版本 {generation}")
+export_snapshots(db, generation) # 寫出 app 啟動時 memory-map 讀取的 snapshot
+
+print(f"限流器統計：{get_rate_limiter().metrics()}")
+print(f"連線池統計：{get_http_client().pool_stats()}")
+print(f"MongoDB 連線池統計：{mongo_pool_stats()}")
\ No newline at end of file
@@ -0,0 +1,29 @@
+import argparse
+
+# 自建模組
+from utils import connect_db, ensure_indexes, profile_queries, enable_profiling, slow_query_stats
+
+parser = argparse.ArgumentParser(description="檢查索引並列出專案中主要查詢的執行計畫與慢查詢統計")
+parser.add_argument("--drop-unknown", action="store_true", help="刪除沒有在 utils/indexes.py 宣告的索引")
+parser.add_argument("--slow-ms", type=int, default=None, help="開啟 profiler，記錄超過幾毫秒的查詢")
+args = parser.parse_args()
+
+# 連線資料庫、選擇要使用的資料庫
+client = connect_db()
+db = client["104"]
+ensure_indexes(db, drop_unknown=args.drop_unknown)
+
+# 各查詢的執行計畫：出現 COLLSCAN 或 docsExamined 遠大於 nReturned 表示沒有用到合適的索引
+for row in profile_queries(db):
+    if "error" in row:
+        print(f"{row['name']}（{row['collection']}）：explain 失敗 {row['error']}")
+        continue
+    print(f"{row['name']}（{row['collection']}）：{' > '.join(row['stages']) or '-'}，"
+          f"回傳 {row['nReturned']} 筆，檢查索引 {row['keysExamined']}、文件 {row['docsExamined']}，{row['millis']} ms")
+
+# 慢查詢統計
+if args.slow_ms is not None and enable_profiling(db, args.slow_ms):
+    print(f"已開啟 profiler，記錄超過 {args.slow_ms} ms 的查詢")
+for stat in slow_query_stats(db):
+    print(f"{stat['_id'].get('ns')} {stat['_id'].get('op')} {stat['_id'].get('plan')}："
+          f"{stat['count']} 次，平均 {stat['avgMillis']:.0f} ms，最長 {stat['maxMillis']} ms，檢查文件 {stat['docsExamined']}")
@@ -1,12 +1,21 @@
 import pandas as pd
-from utils import top_500, display_job_grid
+from utils import enable_copy_on_write, connect_db, ensure_indexes, top_500, load_cached_frame, display_job_grid
 
-# 讀取並處理資料
-csv_filename = '104/taiwan_500.csv'
-top_500_company_jobs = top_500(csv_filename)
+# 篩選出的 DataFrame 與共用資料共享記憶體，不會整份複製
+enable_copy_on_write()
+
+# 連線資料庫、選擇要使用的資料庫
+client = connect_db()
+db = client["104"]
+ensure_indexes(db) # 建立或修正各集合需要的索引，已存在時不會重複建立
 
-# 根據使用者輸入篩選資料
-filtered_data = pd.DataFrame(top_500_company_jobs).copy()
+# 讀取並處理資料，所有使用者共用同一份 DataFrame，只有爬蟲寫入新資料後才重新比對；有同一版本的 snapshot 時直接讀取，
+# 並在載入時建立搜尋索引
+csv_filename = '104/taiwan_500.csv'
+filtered_data = load_cached_frame(
+    db, "top_500", lambda db: pd.DataFrame(top_500(csv_filename, db=db)),
+    snapshot=True, compact=True, search_index=True
+)
 
 # 使用 streamlit run 顯示資料
 display_job_grid(filtered_data, title="前500公司職缺")
\ No newline at end of file
@@ -1,7 +1,26 @@
 # 104/utils/__init__.py
 
-from .connect_db import connect_db, jobs_detail_project, jobs_condition
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .http_client import HttpClient, get_http_client
+from .salary import parse_salary, parse_salaries, backfill_salaries
+from .connect_db import connect_db, mongo_pool_stats, jobs_detail_project, jobs_condition
+from .jobs_view import refresh_jobs_view, find_jobs_view
+from .snapshot import export_snapshots, read_snapshot
+from .compact_frame import compact_jobs_frame, memory_report, enable_copy_on_write
+from .data_cache import load_cached_frame, bump_ingest_generation
 from .list_jobs import list_jobs
-from .get_jobs import multi_thread_get_jobs
+from .async_list_jobs import ListCrawler, list_jobs_concurrently
+from .sync_jobs import sync_jobs, sync_jobs_resumable, job_hash
+from .checkpoint import CrawlCheckpoint
+from .get_jobs import multi_thread_get_jobs, fetch_content, FetchError, ajax_url_from_job, job_url_from_ajax
+from .detail_ingest import parse_detail, DetailResult, ParseError
+from .detail_pipeline import run_detail_pipeline, stream_job_details
+from .detail_sync import find_stale_jobs, reconcile_closed_details, listing_fingerprint
+from .job_queue import DetailQueue, run_queue_worker
+from .company_matcher import CompanyMatcher, get_company_matcher
+from .company_tags import backfill_company_tags
+from .indexes import ensure_indexes, profile_queries, enable_profiling, slow_query_stats
 from .top_500 import top_500
+from .query_planner import compile_query, filter_by_query
+from .search_history import SearchHistory, get_search_history
 from .grid_display import display_job_grid
\ No newline at end of file
@@ -0,0 +1,168 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .list_jobs import BASE_URL, build_list_request, unique_jobs
+from .rate_limiter import get_rate_limiter, parse_retry_after
+from .http_client import get_http_client
+
+class ListCrawler:
+    """
+    以 asyncio 同時爬取多個區域、多個分頁的職缺列表。
+
+    所有請求共用 HttpClient 的連線池，並以兩層 semaphore 控制流量：
+    max_concurrency 為全域同時請求上限，per_host_limit 為單一主機同時請求上限，
+    請求速率則交給與詳情爬蟲共用的 RateLimiter。
+    """
+
+    def __init__(self, max_concurrency=8, per_host_limit=4, max_retries=5, timeout=10, limiter=None):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = limiter or get_rate_limiter()
+
+        # 共用連線池，大小與全域併發數一致，避免連線被丟棄重建
+        self.client = get_http_client(pool_size=max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+        self._global_limit = None
+        self._host_limits = None
+        self._on_page = None
+        self._checkpoint = None
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _get(self, url, params, headers, refresh=False):
+        loop = asyncio.get_running_loop()
+        async with self._global_limit, self._host_limit(url):
+            # 在執行緒中取得 token，快取命中時不會佔用請求額度
+            return await loop.run_in_executor(
+                self.executor,
+                lambda: self.client.get(url, params=params, headers=headers, timeout=self.timeout,
+                                        limiter=self.limiter, refresh=refresh)
+            )
+
+    async def fetch_page(self, area_id, page):
+        """
+        取得單一區域單一分頁的 API 回應，發生錯誤時降低共用速率後略過快取重試。
+        """
+        for attempt in range(1, self.max_retries + 1):
+            params, headers = build_list_request(area_id, page)
+            retry_after = None
+            try:
+                response = await self._get(BASE_URL, params, headers, refresh=attempt > 1)
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    data = {"error": "429 Too Many Requests"}
+                else:
+                    data = response.json()
+            except Exception as e:
+                data = {"error": str(e)}
+
+            if "error" not in data and "data" in data:
+                self.limiter.on_success()
+                return data
+
+            print(f"區域 {area_id} 第 {page} 頁發生錯誤（第 {attempt} 次）：{data.get('error')}，降低速率後重試...")
+            self.limiter.on_throttle(retry_after)
+
+        raise RuntimeError(f"無法取得區域 {area_id} 第 {page} 頁的資料，可能是 104 或網路問題")
+
+    async def _page_done(self, area_id, page, last_page, data):
+        """
+        一個分頁完成後立即交給 on_page 處理（例如寫入資料庫），並記錄到 checkpoint。
+        兩者都是阻塞的資料庫操作，放到執行緒中執行。
+        """
+        loop = asyncio.get_running_loop()
+        if self._on_page is not None:
+            page_jobs = unique_jobs(data["data"], set_id=True)
+            await loop.run_in_executor(self.executor, self._on_page, area_id, page, page_jobs)
+        if self._checkpoint is not None:
+            await loop.run_in_executor(self.executor, self._checkpoint.page_done, area_id, page, last_page)
+        return data
+
+    async def _fetch_page_done(self, area_id, page, last_page):
+        return await self._page_done(area_id, page, last_page, await self.fetch_page(area_id, page))
+
+    async def crawl_area(self, area_id, area_name):
+        """
+        先取第一頁得知總頁數，再同時取得其餘分頁，依頁碼順序合併後去除重複。
+        有 checkpoint 時略過已完成的區域與分頁，只回傳本次新取得的職缺。
+        """
+        state = self._checkpoint.area_state(area_id) if self._checkpoint is not None else {}
+        if state.get("done"):
+            print(f"{area_name}地區已於先前完成，略過")
+            return []
+        done_pages = set(state.get("pages", []))
+
+        jobs_list, expected_total = [], None
+        if 1 in done_pages and state.get("last_page"):
+            last_page = state["last_page"]
+        else:
+            first = await self.fetch_page(area_id, 1)
+            pagination = first.get("metadata", {}).get("pagination", {})
+            expected_total = pagination.get("total")
+            last_page = pagination.get("lastPage", 1)
+            await self._page_done(area_id, 1, last_page, first)
+            jobs_list.extend(first["data"])
+
+        pages = [page for page in range(2, last_page + 1) if page not in done_pages]
+        rest = await asyncio.gather(*(self._fetch_page_done(area_id, page, last_page) for page in pages))
+
+        for data in rest:
+            jobs_list.extend(data["data"])
+        area_jobs = unique_jobs(jobs_list)
+        if self._checkpoint is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._checkpoint.area_done, area_id)
+
+        print(f"{area_name}地區職缺預期總數：{expected_total}，實際取得數：{len(area_jobs)}")
+        return area_jobs
+
+    async def crawl(self, areas, on_page=None, checkpoint=None):
+        """
+        同時爬取所有區域，依 areas 的順序合併並去除重複，回傳格式與 list_jobs(areas) 相同。
+
+        on_page(area_id, page, jobs) 會在每個分頁完成時呼叫，讓呼叫端邊爬邊寫入；
+        checkpoint 為 CrawlCheckpoint，用來略過先前已完成的區域與分頁。
+        """
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits = {}
+        self._on_page = on_page
+        self._checkpoint = checkpoint
+
+        results = await asyncio.gather(*(self.crawl_area(area_id, name) for area_id, name in areas.items()))
+
+        all_jobs = []
+        for area_jobs in results:
+            all_jobs.extend(area_jobs)
+        return unique_jobs(all_jobs, set_id=True)
+
+async def async_list_jobs(areas, max_concurrency=8, per_host_limit=4, on_page=None, checkpoint=None, **kwargs):
+    """
+    非同步版本的 list_jobs，同時爬取所有區域與分頁。
+    """
+    crawler = ListCrawler(max_concurrency=max_concurrency, per_host_limit=per_host_limit, **kwargs)
+    try:
+        return await crawler.crawl(areas, on_page=on_page, checkpoint=checkpoint)
+    finally:
+        crawler.close()
+
+def list_jobs_concurrently(areas, max_concurrency=8, per_host_limit=4, on_page=None, checkpoint=None, **kwargs):
+    """
+    同步呼叫介面，可直接取代 list_jobs(areas)。
+    """
+    return asyncio.run(async_list_jobs(areas, max_concurrency, per_host_limit, on_page, checkpoint, **kwargs))
+
+# 使用範例
+if __name__ == "__main__":
+    import json
+    all_jobs = list_jobs_concurrently({"6001001001": "中正", "6001001002": "大同"})
+    print(json.dumps(all_jobs, ensure_ascii=False, indent=2))
@@ -0,0 +1,48 @@
+import datetime
+from .sync_jobs import sync_timestamp
+
+class CrawlCheckpoint:
+    """
+    記錄列表爬蟲每個區域、每個分頁的進度，存在 MongoDB 的 crawl_state 集合中，
+    中斷後重新執行可以從上次完成的分頁繼續。
+    """
+
+    def __init__(self, collection, name, max_age_hours=6):
+        self.collection = collection
+        self.name = name
+        self.max_age = datetime.timedelta(hours=max_age_hours)
+        self.state = None
+
+    def start(self, resume=True):
+        """
+        開始或接續一次爬取，回傳本次爬取的開始時間（接續時沿用原本的開始時間）。
+        超過 max_age 的未完成進度視為過期，重新開始。
+        """
+        state = self.collection.find_one({"_id": self.name})
+        now = sync_timestamp()
+        if resume and state and state.get("status") == "running" and now - state["started"] < self.max_age:
+            self.state = state
+            done_areas = sum(1 for area in state["areas"].values() if area.get("done"))
+            print(f"接續 {state['started']:%Y-%m-%d %H:%M} 開始的爬取，已完成 {done_areas} 個區域")
+        else:
+            self.state = {"_id": self.name, "started": now, "status": "running", "areas": {}}
+            self.collection.replace_one({"_id": self.name}, self.state, upsert=True)
+        return self.state["started"]
+
+    def area_state(self, area_id):
+        return self.state["areas"].get(area_id, {})
+
+    def page_done(self, area_id, page, last_page):
+        self.collection.update_one(
+            {"_id": self.name},
+            {"$addToSet": {f"areas.{area_id}.pages": page}, "$set": {f"areas.{area_id}.last_page": last_page}}
+        )
+
+    def area_done(self, area_id):
+        self.collection.update_one({"_id": self.name}, {"$set": {f"areas.{area_id}.done": True}})
+
+    def finish(self):
+        self.collection.update_one(
+            {"_id": self.name},
+            {"$set": {"status": "done", "finished": datetime.datetime.now()}}
+        )
@@ -0,0 +1,48 @@
+import pandas as pd
+from .text_normalize import ARROW_STRING
+
+# 不重複值少的欄位用 categorical，每個值（包含公司名稱）在記憶體中只存一份
+CATEGORY_COLUMNS = ("company", "industry", "address", "salaryType")
+INTEGER_COLUMNS = ("employees", "rank")
+FLOAT_COLUMNS = ("annualSalary",)
+
+def enable_copy_on_write():
+    """
+    開啟 pandas 的 copy-on-write，篩選、選取欄位時共用原本的資料，只有被修改時才複製。
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+def compact_jobs_frame(data):
+    """
+    將職缺 DataFrame 轉成精簡的欄位型別：
+    CATEGORY_COLUMNS 轉 categorical，employees、rank 轉可為空的整數，annualSalary 轉 float32，
+    其餘文字欄位轉成 Arrow 字串（沒有 pyarrow 時維持原樣）。已是目標型別的欄位不會重新轉換。
+    """
+    columns = {}
+    for col in data.columns:
+        series = data[col]
+        if col in CATEGORY_COLUMNS:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+        elif col in INTEGER_COLUMNS:
+            series = pd.to_numeric(series, errors="coerce").astype("Int32")
+        elif col in FLOAT_COLUMNS:
+            series = pd.to_numeric(series, errors="coerce").astype("float32")
+        elif ARROW_STRING and series.dtype == object:
+            series = series.astype(ARROW_STRING)
+        columns[col] = series
+    return pd.DataFrame(columns, index=data.index)
+
+def memory_report(data):
+    """
+    回傳每個欄位的型別與佔用位元組數（含字串內容），依大小排序。
+    """
+    usage = data.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"dtype": data.dtypes.astype(str), "bytes": usage})
+    return report.sort_values("bytes", ascending=False)
+
+def print_memory_report(data, name):
+    report = memory_report(data)
+    print(f"{name} 共 {len(data)} 筆，佔用 {report['bytes'].sum() / 1024 / 1024:.1f} MB")
+    for col, row in report.iterrows():
+        print(f"  {col:<14} {row['dtype']:<16} {row['bytes'] / 1024 / 1024:8.2f} MB")
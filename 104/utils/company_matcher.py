@@ -0,0 +1,120 @@
+import os
+import csv
+import unicodedata
+from collections import deque
+
+# 比對前移除的公司型態字尾，較長的放前面
+COMPANY_SUFFIXES = ("股份有限公司", "有限公司", "股份公司", "分公司", "公司")
+# 移除字尾後太短的名稱容易誤判，不列入比對
+MIN_NAME_LENGTH = 2
+
+def clean_company(name):
+    """
+    全形轉半形（NFKC）、臺 統一成 台、去除空白並轉小寫，保留公司型態字尾。
+    """
+    name = unicodedata.normalize("NFKC", name).replace("臺", "台")
+    return "".join(name.split()).lower()
+
+def normalize_company(name):
+    """
+    公司名稱正規化：clean_company 後再移除公司型態字尾。
+    """
+    name = clean_company(name)
+    for suffix in COMPANY_SUFFIXES:
+        if name.endswith(suffix) and len(name) - len(suffix) >= MIN_NAME_LENGTH:
+            return name[:-len(suffix)]
+    return name
+
+class CompanyMatcher:
+    """
+    以 Aho-Corasick 自動機比對公司名稱，一次掃描即可找出名稱中出現的所有登記公司，
+    時間與名稱長度成正比，不隨公司數量增加。
+
+    自動機中存的是移除字尾後的名稱，比對到的名稱後面必須緊接公司型態字尾（例如 台積電 ... 股份有限公司_台積電），
+    或是與整個名稱相同，否則像 大同大學、高品質生活有限公司 這類只是包含短名稱的公司會被誤判。
+
+    rows 為 CSV 的每一列，依序編上 rank（從 1 開始）。
+    """
+
+    def __init__(self, rows, name_field="公司名稱"):
+        self.rows = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for rank, row in enumerate(rows, start=1):
+            row = dict(row, rank=rank)
+            pattern = normalize_company(row[name_field])
+            if len(pattern) < MIN_NAME_LENGTH:
+                continue
+            self.rows.append(row)
+            self._add(pattern, len(self.rows) - 1)
+        self._build_fail_links()
+
+    def _add(self, pattern, row_index):
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = next_node
+        self.output[node].append((len(pattern), row_index))
+
+    def _build_fail_links(self):
+        # 以 BFS 建立失敗連結，並把失敗節點的輸出併入，掃描時不需要沿連結往回找
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def match_all(self, name):
+        """
+        回傳 name 中出現的所有公司（CSV 列），依名稱長度由長到短、rank 由小到大排序。
+        """
+        name = clean_company(name)
+        found = {}
+        node = 0
+        for end, char in enumerate(name, start=1):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for length, row_index in self.output[node]:
+                if name.startswith(COMPANY_SUFFIXES, end) or (end == len(name) and end == length):
+                    found[row_index] = length
+        ordered = sorted(found, key=lambda i: (-found[i], self.rows[i]["rank"]))
+        return [self.rows[i] for i in ordered]
+
+    def match(self, name):
+        """
+        回傳 name 對應的公司（最長、最具體的名稱），沒有符合時回傳 None。
+        """
+        matched = self.match_all(name)
+        return matched[0] if matched else None
+
+    @classmethod
+    def from_csv(cls, csv_filename, name_field="公司名稱"):
+        with open(csv_filename, mode='r', encoding='utf-8-sig') as f:
+            return cls(csv.DictReader(f), name_field=name_field)
+
+# 依 CSV 路徑快取，檔案修改後重新建立
+_matchers = {}
+
+def get_company_matcher(csv_filename="104/taiwan_500.csv"):
+    """
+    取得 csv_filename 的公司比對器，同一個檔案只建立一次。
+    """
+    mtime = os.path.getmtime(csv_filename)
+    entry = _matchers.get(csv_filename)
+    if entry is None or entry[0] != mtime:
+        entry = (mtime, CompanyMatcher.from_csv(csv_filename))
+        _matchers[csv_filename] = entry
+    return entry[1]
@@ -0,0 +1,59 @@
+import os
+from pymongo import UpdateOne
+from .company_matcher import get_company_matcher, normalize_company
+
+# jobs_detail 中記錄前五百大企業比對結果的欄位，沒有符合時不存在
+TAG_FIELD = "_top500"
+# 同時符合部分索引的條件並提供 rank 的範圍，查詢才能使用 top500_rank 索引（見 indexes.py）
+TAGGED_QUERY = {TAG_FIELD: {"$exists": True}, f"{TAG_FIELD}.rank": {"$gte": 1}}
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "taiwan_500.csv")
+
+def company_tag(company, matcher=None):
+    """
+    回傳公司名稱對應的前五百大企業標記 {key, rank, name}，沒有符合時回傳 None。
+    """
+    matcher = matcher or get_company_matcher(DEFAULT_CSV)
+    row = matcher.match(company or "")
+    if row is None:
+        return None
+    return {"key": normalize_company(row["公司名稱"]), "rank": row["rank"], "name": row["公司名稱"].strip()}
+
+def tag_job_detail(job_detail, matcher=None):
+    """
+    寫入 jobs_detail 前呼叫，依 header.custName 設定或移除 _top500 標記。
+    """
+    tag = company_tag(job_detail.get("header", {}).get("custName"), matcher)
+    if tag is None:
+        job_detail.pop(TAG_FIELD, None)
+    else:
+        job_detail[TAG_FIELD] = tag
+    return job_detail
+
+def backfill_company_tags(collection, matcher=None, batch_size=500):
+    """
+    重新比對 collection 中所有職缺詳情的公司名稱，只更新標記有變動的文件。
+    用於既有資料或 taiwan_500.csv 更新後。回傳 {scanned, tagged, changed}。
+    """
+    matcher = matcher or get_company_matcher(DEFAULT_CSV)
+    stats = {"scanned": 0, "tagged": 0, "changed": 0}
+    operations = []
+
+    def flush():
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            operations.clear()
+
+    for doc in collection.find({}, {"header.custName": 1, TAG_FIELD: 1}):
+        stats["scanned"] += 1
+        tag = company_tag(doc.get("header", {}).get("custName"), matcher)
+        if tag is not None:
+            stats["tagged"] += 1
+        if tag == doc.get(TAG_FIELD):
+            continue
+        update = {"$unset": {TAG_FIELD: ""}} if tag is None else {"$set": {TAG_FIELD: tag}}
+        operations.append(UpdateOne({"_id": doc["_id"]}, update))
+        stats["changed"] += 1
+        if len(operations) >= batch_size:
+            flush()
+    flush()
+    return stats
@@ -1,14 +1,17 @@
 import re
 import os
+import threading
+import importlib.util
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+from .salary import SALARY_FIELD
 
 # 載入 .env 檔案中的環境變數
 load_dotenv()
 
-def connect_db():
+def mongo_uri():
     """
-    連線到 MongoDB 資料庫
+    依環境變數組出 MongoDB 連線字串
     """
 
     ENV = os.getenv("ENV", "dev")
@@ -17,10 +20,133 @@ def connect_db():
     MONGO_INITDB_ROOT_USERNAME = os.getenv("MONGO_INITDB_ROOT_USERNAME", "root")
     MONGO_INITDB_ROOT_PASSWORD = os.getenv("MONGO_INITDB_ROOT_PASSWORD", "root")
     if ENV == "local":
-        uri = f"mongodb://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}@{MONGO_HOST}:{MONGO_PORT}"
-    else:
-        uri = f"mongodb+srv://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}@{MONGO_HOST}"
-    return MongoClient(uri)
+        return f"mongodb://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}@{MONGO_HOST}:{MONGO_PORT}"
+    return f"mongodb+srv://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}@{MONGO_HOST}"
+
+def available_compressors():
+    """
+    可用的網路壓縮方式，zstd、snappy 需要安裝 zstandard、python-snappy 才會啟用。
+    """
+    compressors = []
+    if importlib.util.find_spec("zstandard"):
+        compressors.append("zstd")
+    if importlib.util.find_spec("snappy"):
+        compressors.append("snappy")
+    compressors.append("zlib")
+    return compressors
+
+def client_options():
+    """
+    MongoClient 的連線池、逾時、壓縮與讀取偏好設定，可用環境變數調整。
+    """
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_MS", "300000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+        "compressors": os.getenv("MONGO_COMPRESSORS") or ",".join(available_compressors()),
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+        "appname": os.getenv("MONGO_APP_NAME", "104-aijob"),
+    }
+    if os.getenv("MONGO_SOCKET_TIMEOUT_MS"):
+        options["socketTimeoutMS"] = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS"))
+    return options
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    統計連線池的建立、關閉與借出次數，由 mongo_pool_stats() 讀取。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"created": 0, "closed": 0, "checked_out": 0, "checked_in": 0, "checkout_failed": 0, "cleared": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._count("checked_out")
+
+    def connection_checked_in(self, event):
+        self._count("checked_in")
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.counts)
+        stats["open"] = stats["created"] - stats["closed"]
+        stats["in_use"] = stats["checked_out"] - stats["checked_in"]
+        return stats
+
+# 整個程序共用的 MongoClient，依名稱區分；fork 後子程序會重新建立
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _reset_clients():
+    # fork 出來的子程序不能沿用父程序的連線與監控執行緒，只清掉參照、不關閉
+    _clients.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+def connect_db(name="default", **options):
+    """
+    連線到 MongoDB 資料庫
+
+    回傳整個程序共用的 MongoClient，第一次呼叫時才建立，之後的呼叫（包含 Streamlit 每次 rerun）
+    都沿用同一個連線池。options 會覆蓋 client_options() 的設定，只在第一次建立該名稱的 client 時生效。
+    """
+    entry = _clients.get(name)
+    if entry is not None and entry["pid"] == os.getpid():
+        return entry["client"]
+
+    with _clients_lock:
+        entry = _clients.get(name)
+        if entry is None or entry["pid"] != os.getpid():
+            metrics = PoolMetrics()
+            client = MongoClient(mongo_uri(), event_listeners=[metrics], **{**client_options(), **options})
+            entry = {"client": client, "metrics": metrics, "pid": os.getpid()}
+            _clients[name] = entry
+        return entry["client"]
+
+def mongo_pool_stats(name="default"):
+    """
+    回傳共用 client 的連線池統計（建立、關閉、借出次數與目前使用中的連線數），尚未連線時回傳空 dict。
+    """
+    entry = _clients.get(name)
+    if entry is None:
+        return {}
+    stats = entry["metrics"].snapshot()
+    stats["maxPoolSize"] = entry["client"].options.pool_options.max_pool_size
+    return stats
 
 def jobs_detail_project():
     """
@@ -105,111 +231,8 @@ def jobs_detail_project():
                     }
                 }
             },
-            # 換算年薪，時薪、日薪不計算，月薪乘 12 計算
-            'annualSalary': {
-                '$switch': {
-                    'branches': [
-                        {
-                            'case': { '$eq': ['$jobDetail.salaryType', 10] },
-                            'then': 0
-                        },
-                        {
-                            'case': { '$eq': ['$jobDetail.salaryType', 50] },
-                            'then': {
-                                '$let': {
-                                    'vars': {
-                                        'cleaned': {
-                                            '$reduce': {
-                                                'input': ['月薪', '元以上', '元', ','],
-                                                'initialValue': '$jobDetail.salary',
-                                                'in': {
-                                                    '$replaceAll': {
-                                                        'input': '$$value',
-                                                        'find': '$$this',
-                                                        'replacement': ''
-                                                    }
-                                                }
-                                            }
-                                        }
-                                    },
-                                    'in': {
-                                        '$multiply': [
-                                            {
-                                                '$let': {
-                                                    'vars': {
-                                                        'parts': { '$split': ['$$cleaned', '~'] }
-                                                    },
-                                                    'in': {
-                                                        '$cond': [
-                                                            { '$gt': [{ '$size': '$$parts' }, 1] },
-                                                            {
-                                                                '$avg': {
-                                                                    '$map': {
-                                                                        'input': '$$parts',
-                                                                        'as': 'p',
-                                                                        'in': { '$toDouble': '$$p' }
-                                                                    }
-                                                                }
-                                                            },
-                                                            { '$toDouble': { '$arrayElemAt': ['$$parts', 0] } }
-                                                        ]
-                                                    }
-                                                }
-                                            },
-                                            12
-                                        ]
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            'case': { '$eq': ['$jobDetail.salaryType', 60] },
-                            'then': {
-                                '$let': {
-                                    'vars': {
-                                        'cleaned': {
-                                            '$reduce': {
-                                                'input': ['年薪', '元以上', '元', ','],
-                                                'initialValue': '$jobDetail.salary',
-                                                'in': {
-                                                    '$replaceAll': {
-                                                        'input': '$$value',
-                                                        'find': '$$this',
-                                                        'replacement': ''
-                                                    }
-                                                }
-                                            }
-                                        }
-                                    },
-                                    'in': {
-                                        '$let': {
-                                            'vars': {
-                                                'parts': { '$split': ['$$cleaned', '~'] }
-                                            },
-                                            'in': {
-                                                '$cond': [
-                                                    { '$gt': [{ '$size': '$$parts' }, 1] },
-                                                    {
-                                                        '$avg': {
-                                                            '$map': {
-                                                                'input': '$$parts',
-                                                                'as': 'p',
-                                                                'in': { '$toDouble': '$$p' }
-                                                            }
-                                                        }
-                                                    },
-                                                    { '$toDouble': { '$arrayElemAt': ['$$parts', 0] } }
-                                                ]
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    ],
-                    'default': None
-                }
-            },
+            # 寫入時已由 utils/salary.py 解析並換算成年薪
+            'annualSalary': f'${SALARY_FIELD}.annual',
             'other': '$condition.other',
             'detail': '$jobDetail.jobDescription'
         }
@@ -0,0 +1,73 @@
+import os
+import time
+import datetime
+import threading
+from pymongo import ReturnDocument
+from .snapshot import read_snapshot
+from .compact_frame import compact_jobs_frame, print_memory_report
+from .search_index import get_search_index, discard_search_index
+
+META_COLLECTION = "ingest_meta"
+
+def bump_ingest_generation(db):
+    """
+    爬蟲寫入新資料後呼叫，將 ingest 世代編號加一，讓 app 端的快取失效。
+    """
+    doc = db[META_COLLECTION].find_one_and_update(
+        {"_id": "jobs"},
+        {"$inc": {"generation": 1}, "$set": {"updatedAt": datetime.datetime.now()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["generation"]
+
+def current_ingest_generation(db):
+    doc = db[META_COLLECTION].find_one({"_id": "jobs"}, {"generation": 1})
+    return doc.get("generation", 0) if doc else 0
+
+# 整個程序共用的 DataFrame 快取，Streamlit 的所有 session 都在同一個程序中
+_frames = {}
+_frames_lock = threading.Lock()
+
+def load_cached_frame(db, name, loader, check_interval=None, snapshot=False, compact=False, search_index=False):
+    """
+    取得名為 name 的共用 DataFrame，只有 ingest 世代編號改變時才重新呼叫 loader(db) 載入。
+    世代編號最多每 check_interval 秒（預設 DATA_CACHE_CHECK_SECONDS，30 秒）查詢一次。
+    snapshot 為 True 時優先 memory-map 讀取同一世代的 snapshot（見 snapshot.py），沒有才呼叫 loader。
+    compact 為 True 時轉成精簡的欄位型別（見 compact_frame.py），並印出各欄位的記憶體用量。
+    search_index 為 True 時在載入時建立搜尋索引（見 search_index.py），第一次搜尋不需等待，並移除舊版本的索引。
+
+    回傳的 DataFrame 由所有使用者共用，呼叫端不可直接修改。
+    """
+    if check_interval is None:
+        check_interval = float(os.getenv("DATA_CACHE_CHECK_SECONDS", "30"))
+
+    entry = _frames.get(name)
+    if entry and time.monotonic() - entry["checked"] < check_interval:
+        return entry["data"]
+
+    generation = current_ingest_generation(db)
+    if entry and entry["generation"] == generation:
+        entry["checked"] = time.monotonic()
+        return entry["data"]
+
+    with _frames_lock:
+        # 其他 session 可能已經在等待期間載入完成
+        entry = _frames.get(name)
+        if entry and entry["generation"] == generation:
+            return entry["data"]
+        data = read_snapshot(name, generation) if snapshot else None
+        source = "snapshot"
+        if data is None:
+            data, source = loader(db), "MongoDB"
+        if compact:
+            data = compact_jobs_frame(data)
+        if search_index:
+            get_search_index(data)
+        if entry:
+            discard_search_index(entry["data"])
+        _frames[name] = {"generation": generation, "data": data, "checked": time.monotonic()}
+        print(f"已從 {source} 載入 {name}（第 {generation} 版），共 {len(data)} 筆")
+        if compact:
+            print_memory_report(data, name)
+        return data
@@ -0,0 +1,129 @@
+import os
+import json
+import zlib
+import importlib.util
+from dataclasses import dataclass
+from bson import Binary
+from .get_jobs import FetchError
+
+# 有安裝 orjson 或 msgspec 時用較快的 JSON 解碼器，都沒有時用標準函式庫
+if importlib.util.find_spec("orjson"):
+    import orjson
+    json_loads, JSON_ERRORS = orjson.loads, (orjson.JSONDecodeError,)
+elif importlib.util.find_spec("msgspec"):
+    import msgspec
+    json_loads, JSON_ERRORS = msgspec.json.decode, (msgspec.DecodeError,)
+else:
+    json_loads, JSON_ERRORS = json.loads, (json.JSONDecodeError, UnicodeDecodeError)
+
+# 設定 DETAIL_KEEP_RAW=1 時以 zlib 壓縮保留原始回應，存在 _raw
+KEEP_RAW = os.getenv("DETAIL_KEEP_RAW", "0") == "1"
+
+# jobs_detail 保留的欄位：(路徑, 型別, 是否必要, 缺少時的預設值)，只保留 app 投影與 ingest 標記用到的欄位
+DETAIL_SCHEMA = (
+    ("header.jobName", str, True, None),
+    ("header.custName", str, True, None),
+    ("jobDetail.jobDescription", str, False, ""),
+    ("jobDetail.salary", str, False, ""),
+    ("jobDetail.salaryType", int, False, None),
+    ("jobDetail.addressRegion", str, False, ""),
+    ("industry", str, False, ""),
+    ("employees", str, False, "暫不提供"),
+    ("condition.specialty", list, False, []),
+    ("condition.skill", list, False, []),
+    ("condition.other", str, False, ""),
+)
+
+@dataclass
+class ParseError:
+    """
+    回應無法解析或不符合 DETAIL_SCHEMA。reason 為 invalid_json、missing_data、missing_field 或 invalid_field。
+    """
+    url: str
+    reason: str
+    message: str
+
+    def __str__(self):
+        return f"Error parsing {self.url}: {self.message}"
+
+@dataclass
+class DetailResult:
+    """
+    單筆職缺詳情的處理結果，成功時 document 為要寫入 jobs_detail 的文件，失敗時 error 為 FetchError 或 ParseError。
+    """
+    url: str
+    document: dict = None
+    error: object = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+def _get_path(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+def _set_path(document, path, value):
+    *parents, key = path.split(".")
+    for parent in parents:
+        document = document.setdefault(parent, {})
+    document[key] = value
+
+def _coerce(value, expected):
+    if isinstance(value, expected) and not (expected is int and isinstance(value, bool)):
+        return value
+    if expected is int:
+        return int(value)
+    if expected is str and isinstance(value, (int, float)):
+        return str(value)
+    raise TypeError(f"應為 {expected.__name__}，實際為 {type(value).__name__}")
+
+def _trim_items(items):
+    # specialty、skill 只用到 description
+    return [{"description": item.get("description", "")} for item in items if isinstance(item, dict)]
+
+def parse_detail(url, payload, keep_raw=None):
+    """
+    解析 104 職缺詳情 API 的回應（bytes 或 FetchError），依 DETAIL_SCHEMA 驗證並只保留需要的欄位。
+    回傳 DetailResult，不會拋出例外。
+    """
+    if isinstance(payload, FetchError):
+        return DetailResult(url, error=payload)
+    try:
+        data = json_loads(payload)
+    except JSON_ERRORS as e:
+        return DetailResult(url, error=ParseError(url, "invalid_json", str(e)))
+    data = data.get("data") if isinstance(data, dict) else None
+    if not isinstance(data, dict):
+        return DetailResult(url, error=ParseError(url, "missing_data", "回應中沒有 data"))
+
+    document = {"_id": url}
+    for path, expected, required, default in DETAIL_SCHEMA:
+        value = _get_path(data, path)
+        if value is None:
+            if required:
+                return DetailResult(url, error=ParseError(url, "missing_field", f"缺少 {path}"))
+            value = list(default) if expected is list else default
+        else:
+            try:
+                value = _coerce(value, expected)
+            except (TypeError, ValueError) as e:
+                return DetailResult(url, error=ParseError(url, "invalid_field", f"{path} {e}"))
+        if expected is list and value:
+            value = _trim_items(value)
+        _set_path(document, path, value)
+
+    if KEEP_RAW if keep_raw is None else keep_raw:
+        raw = payload if isinstance(payload, bytes) else payload.encode("utf-8")
+        document["_raw"] = Binary(zlib.compress(raw))
+    return DetailResult(url, document=document)
+
+def decompress_raw(document):
+    """
+    取回 _raw 中的原始回應（bytes），沒有保留時回傳 None。
+    """
+    raw = document.get("_raw")
+    return zlib.decompress(raw) if raw is not None else None
@@ -0,0 +1,133 @@
+import queue
+import logging
+import datetime
+import threading
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+from .get_jobs import FetchError, fetch_response, job_url_from_ajax
+from .detail_ingest import parse_detail
+from .log import get_logger, log_event
+from .http_client import get_http_client
+from .company_tags import tag_job_detail
+from .salary import tag_salaries
+
+# 通知 writer 某個 fetcher 已結束的標記
+_DONE = object()
+
+logger = get_logger("104.detail")
+
+def fetch_detail(ajax_url):
+    """
+    爬取並解析單筆職缺詳情，回傳 DetailResult。每份回應只解析一次，通過 parse_detail 驗證後才寫入 HTTP 快取。
+    需要爬取代表列表資料已變動或詳情過期，因此略過快取，避免取回舊內容後又記上新的列表指紋。
+    """
+    url = job_url_from_ajax(ajax_url)
+    response = fetch_response(ajax_url, cacheable=None, refresh=True)
+    if isinstance(response, FetchError):
+        return parse_detail(url, response)
+    result = parse_detail(url, response.content)
+    if result.ok:
+        get_http_client().store(ajax_url, response)
+    return result
+
+def _fetcher(url_iter, iter_lock, out_queue, on_failed=None):
+    """
+    從共用的 URL iterator 取出下一個 ajax URL，爬取並解析後放進有界佇列。
+    佇列已滿時 put 會阻塞，讓爬取速度自動配合寫入速度。失敗時以 on_failed(url, error) 回報。
+    """
+    try:
+        while True:
+            with iter_lock:
+                ajax_url = next(url_iter, None)
+            if ajax_url is None:
+                break
+            result = fetch_detail(ajax_url)
+            url = result.url
+            if result.ok:
+                out_queue.put(result.document)
+                continue
+            log_event(logger, logging.WARNING, "detail_failed", url=url,
+                      kind=type(result.error).__name__, reason=result.error.reason, message=result.error.message)
+            if on_failed is not None:
+                on_failed(url, result.error)
+    finally:
+        out_queue.put(_DONE)
+
+def stream_job_details(ajax_urls, max_workers=5, queue_size=100, flush_interval=2.0, on_failed=None):
+    """
+    以 max_workers 個 fetcher 執行緒同時爬取職缺詳情，每完成一筆就立即產出。
+    佇列暫時沒有資料超過 flush_interval 秒時產出 None，讓呼叫端有機會先寫入已累積的資料。
+    爬取或解析失敗的職缺會交給 on_failed(url, error)，error 為 FetchError 或 ParseError。
+    """
+    get_http_client(pool_size=max_workers) # 連線池大小配合 fetcher 數
+    out_queue = queue.Queue(maxsize=queue_size)
+    url_iter, iter_lock = iter(ajax_urls), threading.Lock()
+    workers = [
+        threading.Thread(target=_fetcher, args=(url_iter, iter_lock, out_queue, on_failed), daemon=True)
+        for _ in range(max_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = len(workers)
+    while running:
+        try:
+            item = out_queue.get(timeout=flush_interval)
+        except queue.Empty:
+            yield None
+            continue
+        if item is _DONE:
+            running -= 1
+            continue
+        yield item
+
+def _write_batch(collection, batch):
+    """
+    以 unordered bulk_write 寫入一批文件，已存在的職缺詳情會被整份取代，
+    單筆失敗不影響其他文件寫入。
+    """
+    operations = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch]
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        written = result.upserted_count + result.modified_count
+    except BulkWriteError as e:
+        written = e.details.get("nUpserted", 0) + e.details.get("nModified", 0)
+        log_event(logger, logging.WARNING, "batch_write_errors", errors=len(e.details.get("writeErrors", [])))
+    log_event(logger, logging.INFO, "batch_written", size=len(batch), written=written)
+    if logger.isEnabledFor(logging.DEBUG):
+        for job_detail in batch:
+            log_event(logger, logging.DEBUG, "detail_saved", url=job_detail["_id"],
+                      company=job_detail["header"]["custName"], job=job_detail["header"]["jobName"])
+    return written
+
+def run_detail_pipeline(collection, ajax_urls, max_workers=5, queue_size=100, batch_size=50, flush_interval=2.0,
+                        fingerprints=None, on_written=None, on_failed=None):
+    """
+    串流爬取 ajax_urls 的職缺詳情並批次寫入 collection，
+    網路請求與資料庫寫入同時進行，記憶體用量只取決於 queue_size 與 batch_size。
+    fingerprints 為 {職缺 URL: 列表指紋}，會存入 _listingHash 供下次判斷是否需要重新爬取。
+    on_written(urls) 在每批寫入後呼叫，on_failed(url, error) 在單筆爬取或解析失敗時呼叫，可用來記錄進度。
+    """
+    fingerprints = {} if fingerprints is None else fingerprints
+    stats = {"fetched": 0, "written": 0}
+    batch = []
+
+    def write(batch):
+        tag_salaries(batch) # 整批解析薪資，讀取時不需要再以 aggregation 換算
+        stats["written"] += _write_batch(collection, batch)
+        if on_written is not None:
+            on_written([doc["_id"] for doc in batch])
+
+    for job_detail in stream_job_details(ajax_urls, max_workers, queue_size, flush_interval, on_failed):
+        if job_detail is not None:
+            job_detail["_listingHash"] = fingerprints.get(job_detail["_id"])
+            job_detail["_fetchedAt"] = datetime.datetime.now()
+            tag_job_detail(job_detail) # 寫入時一併標記前五百大企業
+            batch.append(job_detail)
+            stats["fetched"] += 1
+        if batch and (len(batch) >= batch_size or job_detail is None):
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+    return stats
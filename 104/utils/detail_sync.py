@@ -0,0 +1,74 @@
+import datetime
+from .sync_jobs import job_hash
+
+def listing_fingerprint(job):
+    """
+    取得職缺列表資料的指紋。jobs 集合同步時已存下 _hash（涵蓋 appearDate、薪資、描述等欄位），
+    若沒有則即時計算。
+    """
+    return job.get("_hash") or job_hash(job)
+
+def merge_join(left, right):
+    """
+    合併兩個依 _id 遞增排序的 cursor，依序產出 (_id, 左邊的文件或 None, 右邊的文件或 None)。
+    """
+    left, right = iter(left), iter(right)
+    left_doc, right_doc = next(left, None), next(right, None)
+    while left_doc is not None or right_doc is not None:
+        if right_doc is None or (left_doc is not None and left_doc["_id"] < right_doc["_id"]):
+            yield left_doc["_id"], left_doc, None
+            left_doc = next(left, None)
+        elif left_doc is None or right_doc["_id"] < left_doc["_id"]:
+            yield right_doc["_id"], None, right_doc
+            right_doc = next(right, None)
+        else:
+            yield left_doc["_id"], left_doc, right_doc
+            left_doc, right_doc = next(left, None), next(right, None)
+
+def find_stale_jobs(jobs_collection, detail_collection, ttl_days=None):
+    """
+    比對 jobs 的列表指紋與 jobs_detail 存下的 _listingHash，找出需要（重新）爬取詳情的職缺。
+
+    以下情況視為過期：尚未爬取、列表指紋不同、沒有指紋的舊資料，
+    以及設定 ttl_days 時 _fetchedAt 早於 ttl_days 天前的資料。
+    兩個集合依 _id 排序後合併比對，不需要先把 jobs_detail 全部載入記憶體。
+    回傳 {職缺 URL: 列表指紋}。
+    """
+    expires_before = None
+    if ttl_days is not None:
+        expires_before = datetime.datetime.now() - datetime.timedelta(days=ttl_days)
+
+    jobs = jobs_collection.find({"closed": {"$ne": True}}).sort("_id", 1)
+    details = detail_collection.find({}, {"_listingHash": 1, "_fetchedAt": 1}).sort("_id", 1)
+
+    stale = {}
+    for _, job, detail in merge_join(jobs, details):
+        if job is None:
+            continue
+        fingerprint = listing_fingerprint(job)
+        detail = detail or {}
+        fetched_at = detail.get("_fetchedAt")
+        expired = expires_before is not None and (fetched_at is None or fetched_at < expires_before)
+        if detail.get("_listingHash") != fingerprint or expired:
+            stale[job["_id"]] = fingerprint
+    return stale
+
+def reconcile_closed_details(jobs_collection, detail_collection, batch_size=1000):
+    """
+    刪除 jobs_detail 中已關閉或已不在 jobs 的職缺詳情，取代將所有 URL 放進 $nin 的 delete_many。
+    兩邊都只讀取 _id 並依 _id 排序後合併比對，每 batch_size 筆刪除一次，記憶體用量與職缺數無關。
+    回傳刪除的筆數。
+    """
+    open_jobs = jobs_collection.find({"closed": {"$ne": True}}, {"_id": 1}).sort("_id", 1)
+    details = detail_collection.find({}, {"_id": 1}).sort("_id", 1)
+
+    deleted, batch = 0, []
+    for url, job, detail in merge_join(open_jobs, details):
+        if detail is not None and job is None:
+            batch.append(url)
+        if len(batch) >= batch_size:
+            deleted += detail_collection.delete_many({"_id": {"$in": batch}}).deleted_count
+            batch = []
+    if batch:
+        deleted += detail_collection.delete_many({"_id": {"$in": batch}}).deleted_count
+    return deleted
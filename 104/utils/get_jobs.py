@@ -1,45 +1,76 @@
-import time
-import requests
+from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from .rate_limiter import get_rate_limiter, parse_retry_after
+from .http_client import get_http_client
+from .http_cache import has_json_data
 
-# 單一請求的函式
-def fetch_data(url):
-    time.sleep(1)
-    payload = {}
-    headers = {
-        'Accept': 'application/json, text/plain, */*',
-        'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7,zh-CN;q=0.6,de;q=0.5,fr;q=0.4,ko;q=0.3,ja;q=0.2',
-        'Connection': 'keep-alive',
-        'Referer': url,  
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36',
-        'sec-ch-ua': '"Not(A:Brand";v="99", "Google Chrome";v="133", "Chromium";v="133"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"macOS"'
-    }
-    
-    while True:
+# 職缺頁面 URL 與 ajax URL 互相轉換
+def ajax_url_from_job(url):
+    job_id = url.rstrip("/").split("/")[-1]
+    return f"https://www.104.com.tw/job/ajax/content/{job_id}"
+
+def job_url_from_ajax(ajax_url):
+    return "https://www.104.com.tw/job/" + ajax_url.rstrip("/").split("/")[-1]
+
+@dataclass
+class FetchError:
+    """
+    請求失敗的結果。reason 為 http_error、throttled 或 network_error。
+    """
+    url: str
+    reason: str
+    message: str
+    status: int = None
+
+    def __str__(self):
+        return f"Error fetching {self.url}: {self.message}"
+
+# 單一請求，成功時回傳回應，失敗時回傳 FetchError
+# cacheable 決定回應是否寫入快取；refresh 為 True 或重試時略過快取
+def fetch_response(url, max_retries=5, cacheable=has_json_data, refresh=False):
+    limiter = get_rate_limiter()
+    client = get_http_client()
+
+    for attempt in range(max_retries):
         try:
-            response = requests.get(url, headers=headers, data=payload, timeout=10)
-            if response.status_code == 429:
-                print(f"收到 429 回應，等待 30 秒後再重試... ({url})")
-                time.sleep(30)
-                continue  # 重新嘗試請求
-            response.raise_for_status()  # 如果狀態碼不在 200~299 會拋出例外
-            return response.text
+            response = client.get(url, headers={"Referer": url}, timeout=10, limiter=limiter,
+                                  cacheable=cacheable, refresh=refresh or attempt > 0)
         except Exception as e:
-            return f"Error fetching {url}: {e}"
+            return FetchError(url, "network_error", str(e))
+        if response.status_code == 429:
+            # 降低共用速率，並依 Retry-After 暫停所有爬蟲的請求
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            print(f"收到 429 回應，{retry_after:.0f} 秒後再重試... ({url})")
+            limiter.on_throttle(retry_after)
+            continue  # 重新嘗試請求
+        if response.status_code >= 400:
+            return FetchError(url, "http_error", f"HTTP {response.status_code}", response.status_code)
+        limiter.on_success()
+        return response
+    return FetchError(url, "throttled", f"連續 {max_retries} 次收到 429 回應", 429)
+
+# 單一請求，成功時回傳回應內容（bytes），失敗時回傳 FetchError
+def fetch_content(url, max_retries=5, cacheable=has_json_data, refresh=False):
+    response = fetch_response(url, max_retries, cacheable, refresh)
+    if isinstance(response, FetchError):
+        return response
+    return response.content
+
+# 單一請求的函式，回傳回應文字，失敗時回傳錯誤訊息字串
+def fetch_data(url, max_retries=5):
+    content = fetch_content(url, max_retries)
+    if isinstance(content, FetchError):
+        return str(content)
+    return content.decode("utf-8", errors="replace")
 
 # 多線程取得所有資料
 def multi_thread_get_jobs(url_list, max_workers=5):
     results = {}
+    get_http_client(pool_size=max_workers) # 連線池大小配合 worker 數
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_url = {executor.submit(fetch_data, url): url for url in url_list}
         for future in as_completed(future_to_url):
-            ajax_url = future_to_url[future]
-            url = "https://www.104.com.tw/job/" + ajax_url.rstrip("/").split("/")[-1]
+            url = job_url_from_ajax(future_to_url[future])
             results[url] = future.result()
     return results
 
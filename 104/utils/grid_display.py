@@ -1,163 +1,79 @@
-import re
 import pandas as pd
 import streamlit as st
 # https://staggrid-examples.streamlit.app/ AgGrid document
 from st_aggrid import AgGrid
 from st_aggrid import JsCode
-from .connect_db import connect_db
-import datetime
-import hashlib
-import json
+from st_aggrid import GridUpdateMode
+from .query_planner import filter_by_query, QuerySyntaxError
+from .search_history import get_search_history
 
-def split_terms(query):
+# 每頁筆數選項，表格只傳送目前這一頁的資料到瀏覽器
+PAGE_SIZES = [50, 100, 200, 500]
+# 內容很長的欄位，表格只顯示開頭，選取職缺後才顯示全文
+HEAVY_COLUMNS = ["other", "detail"]
+PREVIEW_CHARS = 60
+# 對應回 filtered_data 的列位置，表格中隱藏
+ROW_ID = "_row"
+# 不提供排序的欄位
+UNSORTABLE_COLUMNS = ["link"] + HEAVY_COLUMNS
+NO_SORT = "不排序"
+
+def paginate(data, page, page_size):
     """
-    Split the query into terms and identify operators
-    
-    Parameters:
-        query (str): The search query string
-        
-    Returns:
-        list: A list of dictionaries containing terms and their operators
+    取出第 page 頁（從 1 開始）的資料，回傳 (該頁資料, 總頁數)。page 超出範圍時取最後一頁。
     """
-    # Check if the query contains AND or OR operators
-    has_and = "&" in query
-    has_or = "|" in query
-    
-    if has_and and has_or:
-        # If both operators are present, split by & first (AND has higher precedence)
-        and_groups = query.split("&")
-        result = []
-        
-        for and_group in and_groups:
-            # For each AND group, split by | to get OR terms
-            or_terms = and_group.split("|")
-            or_terms = [term.strip() for term in or_terms if term.strip()]
-            
-            if len(or_terms) > 1:
-                # If we have multiple OR terms in this group
-                result.append({"operator": "OR", "terms": or_terms})
-            elif len(or_terms) == 1:
-                # If we have only one term in this group
-                result.append({"operator": "SINGLE", "terms": or_terms})
-        
-        return result
-    elif has_and:
-        # If only AND operator is present
-        terms = query.split("&")
-        terms = [term.strip() for term in terms if term.strip()]
-        return [{"operator": "SINGLE", "terms": [term]} for term in terms]
-    elif has_or:
-        # If only OR operator is present
-        terms = query.split("|")
-        terms = [term.strip() for term in terms if term.strip()]
-        return [{"operator": "OR", "terms": terms}]
-    else:
-        # If no operators are present, split by traditional delimiters
-        terms = re.split(r'[,，、]', query)
-        terms = [term.strip() for term in terms if term.strip()]
-        return [{"operator": "SINGLE", "terms": [term]} for term in terms]
+    page_count = max(1, -(-len(data) // page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    return data.iloc[start:start + page_size], page_count
 
-def filter_by_keywords(data, parsed_terms):
+def sort_frame(data, column, descending=False):
     """
-    Filter data based on keywords and specified fields with support for AND/OR operations
-    
-    Parameters:
-        data (pd.DataFrame): The data to filter
-        parsed_terms (list): List of dictionaries containing terms and operators
-    
-    Returns:
-        pd.DataFrame: Filtered data
+    在分頁前依 column 排序整份搜尋結果，空值排在最後。column 為 None 或不存在時維持原順序。
     """
-    if not parsed_terms:
-        return data
-    
-    # Process all groups with AND logic between them
-    and_results = []
-    
-    for group in parsed_terms:
-        group_terms = group["terms"]
-        operator = group["operator"]
-        
-        if operator == "OR":
-            # Process all terms in this group with OR logic
-            or_mask = process_term(data, group_terms[0])
-            for term in group_terms[1:]:
-                or_mask = or_mask | process_term(data, term)
-            and_results.append(or_mask)
-        else:
-            # Single term, no OR logic needed
-            and_results.append(process_term(data, group_terms[0]))
-    
-    # Combine all group results with AND logic
-    if and_results:
-        final_mask = and_results[0]
-        for mask in and_results[1:]:
-            final_mask = final_mask & mask
-        return data[final_mask]
-    else:
+    if column is None or column not in data.columns:
         return data
+    return data.sort_values(column, ascending=not descending, kind="stable", na_position="last")
 
-def process_term(data, term):
+def preview_page(page_data, start):
     """
-    Process a single search term
-    
-    Parameters:
-        data (pd.DataFrame): The data to search in
-        term (str): The search term
-        
-    Returns:
-        pd.Series: Boolean mask indicating matches
+    建立要傳給表格的資料：長文字欄位只保留前 PREVIEW_CHARS 個字，並加上列位置欄位。
     """
-    # 檢查是否為 NOT 運算（以 ! 開頭）
-    is_not = term.startswith('!')
-    if is_not:
-        term = term[1:].strip()  # 移除 ! 符號
-    
-    # Check if term contains field specification
-    if re.search(r'[:：]', term):
-        # Split into field and search term
-        field_term = re.split(r'[:：]', term, 1)
-        field = field_term[0].strip()
-        search_term = field_term[1].strip()
-        
-        if field in data.columns:
-            # Search in specified field
-            mask = data[field].astype(str).str.lower().str.contains(search_term.lower(), na=False)
-            return ~mask if is_not else mask # 如果是 NOT 運算就使用 ~ 運算子來反轉布林遮罩
-        else:
-            # If field doesn't exist, search in all columns
-            all_fields_mask = False
-            for col in data.columns:
-                col_mask = data[col].astype(str).str.lower().str.contains(search_term.lower(), na=False)
-                all_fields_mask = all_fields_mask | col_mask
-            return ~all_fields_mask if is_not else all_fields_mask
-    else:
-        # No field specified, search in all columns
-        all_fields_mask = False
-        for col in data.columns:
-            col_mask = data[col].astype(str).str.lower().str.contains(term.lower(), na=False)
-            all_fields_mask = all_fields_mask | col_mask
-        return ~all_fields_mask if is_not else all_fields_mask
+    preview = page_data.copy()
+    for col in HEAVY_COLUMNS:
+        if col in preview.columns:
+            text = preview[col].astype(str)
+            preview[col] = text.where(text.str.len() <= PREVIEW_CHARS, text.str[:PREVIEW_CHARS] + "…")
+    preview[ROW_ID] = range(start, start + len(preview))
+    return preview
+
+def selected_row_id(response):
+    """
+    取得表格中被選取列的列位置，沒有選取時回傳 None。
+    """
+    selected = response.selected_rows
+    if selected is None or len(selected) == 0:
+        return None
+    row = selected.iloc[0] if isinstance(selected, pd.DataFrame) else selected[0]
+    return int(row[ROW_ID])
 
 def display_job_grid(data, title):
     """
     顯示職缺網格
     
     參數:
-        data (pd.DataFrame): 職缺數據
+        data (pd.DataFrame): 職缺數據，由所有使用者共用，這裡不會修改它
         title (str): 網格標題
     """
 
-    # 連線資料庫，選擇使用的資料庫與集合
-    client = connect_db()
-    db = client["104"]
-    collection = db["search_history"]
+    # 搜尋紀錄：讀取走程序內的快取，寫入交給背景執行緒批次處理
+    search_history = get_search_history()
 
     # 設定頁面佈局為 wide
     st.set_page_config(layout="wide")
 
-    # 初始化 filtered_data
-    filtered_data = data.copy()
+    # 初始化 filtered_data，篩選時會產生新的 DataFrame，不需要先複製
+    filtered_data = data
     total_count = len(data)
     
     # 創建一個容器來放置標題
@@ -186,13 +102,12 @@ def display_job_grid(data, title):
         col1, col2, col3 = st.columns([5, 5, 1])
         with col1:
             search_query = st.text_input(
-                "搜尋 (欄位:搜尋詞) (&為AND) (|為OR) (!為NOT)", 
+                "搜尋 (欄位:搜尋詞) (&為AND) (|為OR) (!為NOT) (可用括號分組)", 
                 f"{st.session_state.get('search_query', '')}",
-                placeholder="job:數據 | job:ai & address:台北 & !industry:顧問"
+                placeholder="(job:數據 | job:ai) & address:台北 & !industry:顧問"
             )
         with col2:
-            history = collection.find({"grid_title": title}).sort("timestamp", -1).limit(10)
-            history_list = list(history)
+            history_list = search_history.recent(title)
             
             if history_list:
 
@@ -226,38 +141,17 @@ def display_job_grid(data, title):
             if not search_query:
                 st.rerun()
 
-            # 創建搜尋記錄
-            search_record = {
-                "grid_title": title,
-                "search_query": search_query,
-                "timestamp": datetime.datetime.now(),
-                "result_count": len(filtered_data)
-            }
-            
-            # 生成唯一ID 並檢查是否有搜過同樣內容
-            record_str = json.dumps(
-                {k: v for k, v in search_record.items() if k != "timestamp"}, 
-                sort_keys=True
-            )
-            search_id = hashlib.md5(record_str.encode()).hexdigest()
-            search_record["_id"] = search_id
-            existing_record = collection.find_one({"_id": search_id})
-            if not existing_record:
-                collection.insert_one(search_record)
-                # with title_container: st.success(f"已儲存搜尋記錄")
-            else:
-                collection.update_one(
-                    {"_id": search_id},
-                    {"$set": {"timestamp": datetime.datetime.now()}}
-                )
-                # with title_container:st.info(f"已更新搜尋記錄時間戳")
+            # 記錄搜尋（同樣的內容只保留一筆並更新時間），不等待資料庫寫入
+            search_history.record(title, search_query, len(filtered_data))
             st.rerun()
 
     # 先根據包含關鍵字篩選
     if search_query:
-        # 先將 search_query 分割成多個關鍵字
-        search_terms = split_terms(search_query)
-        filtered_data = filter_by_keywords(filtered_data, search_terms)
+        # 將 search_query 編譯成查詢計畫，在搜尋索引上執行
+        try:
+            filtered_data = filter_by_query(filtered_data, search_query)
+        except QuerySyntaxError as e:
+            st.error(f"搜尋語法錯誤：{e}")
 
     # 更新標題顯示，包含過濾後的數據數量
     filtered_count = len(filtered_data)
@@ -276,6 +170,31 @@ def display_job_grid(data, title):
                 <span style='font-size: 1em;'>{status_text}</span></div>")
         
 
+    # 分頁：只把目前這一頁傳給表格，排序在分頁前對整份搜尋結果進行，搜尋或排序條件改變時回到第一頁
+    page_key = f"grid_page_{title}"
+    col1, col2, col3, col4, _ = st.columns([1, 1, 1, 1, 2])
+    with col3:
+        sort_options = [NO_SORT] + [col for col in filtered_data.columns if col not in UNSORTABLE_COLUMNS]
+        sort_column = st.selectbox("排序欄位", sort_options, key=f"grid_sort_{title}")
+    with col4:
+        sort_order = st.selectbox("排序方向", ["由大到小", "由小到大"], key=f"grid_sort_order_{title}")
+    view_state = (search_query, sort_column, sort_order)
+    if st.session_state.get(f"grid_query_{title}") != view_state:
+        st.session_state[f"grid_query_{title}"] = view_state
+        st.session_state[page_key] = 1
+    if sort_column != NO_SORT:
+        filtered_data = sort_frame(filtered_data, sort_column, descending=sort_order == "由大到小")
+    with col2:
+        page_size = st.selectbox("每頁筆數", PAGE_SIZES, index=1, key=f"grid_page_size_{title}")
+    page_count = max(1, -(-filtered_count // page_size))
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    with col1:
+        page = st.number_input(f"頁數 (共 {page_count} 頁)", min_value=1, max_value=page_count, step=1, key=page_key)
+    page_data, _ = paginate(filtered_data, page, page_size)
+    grid_data = preview_page(page_data, (page - 1) * page_size)
+    st.caption("表格標題列的排序與篩選只作用於目前這一頁，要排序全部結果請使用上方的排序欄位")
+
     # 建立完整的 columnDefs，參考 https://ag-grid.com/javascript-data-grid/cell-editing/
     link_cell_renderer = JsCode("""
         class ButtonCellRenderer {
@@ -297,9 +216,9 @@ def display_job_grid(data, title):
         }
     """)
 
-    columns = []
+    columns = [{"field": ROW_ID, "hide": True}]
     for col in filtered_data.columns:
-        if col in ["other", "detail"]:
+        if col in HEAVY_COLUMNS:
             columns.append({ 
                 "resizable": True,
                 "sortable": True,
@@ -331,7 +250,24 @@ def display_job_grid(data, title):
             "flex": 1,
             "minWidth": 150,
         },
-        "domLayout": "normal"
+        "domLayout": "normal",
+        "rowSelection": "single"
     }
 
-    return AgGrid(filtered_data, gridOptions=grid_options, height=750, allow_unsafe_jscode=True, key='grid')
+    response = AgGrid(
+        grid_data, gridOptions=grid_options, height=750, allow_unsafe_jscode=True, key='grid',
+        update_mode=GridUpdateMode.SELECTION_CHANGED
+    )
+
+    # 選取職缺後才顯示長文字欄位的全文
+    row_id = selected_row_id(response)
+    if row_id is not None and row_id < filtered_count:
+        row = filtered_data.iloc[row_id]
+        heading = " - ".join(str(row[col]) for col in ["company", "job"] if col in row.index)
+        with st.expander(heading or "職缺內容", expanded=True):
+            for col in HEAVY_COLUMNS:
+                if col in row.index:
+                    st.markdown(f"**{col}**")
+                    st.text(row[col])
+
+    return response
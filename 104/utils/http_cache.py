@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+class CacheMiss(Exception):
+    """
+    replay 模式下快取中沒有對應的回應。
+    """
+
+class CachedResponse:
+    """
+    由快取內容組成的回應，介面與 requests / httpx 的回應相同。
+    """
+
+    http_version = "cache"
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"{self.status_code} Error for url: {self.url}")
+
+def cache_key(url, params=None):
+    """
+    以 URL 與排序後的查詢參數計算快取 key。
+    """
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    以 SQLite 儲存的 HTTP 回應快取。
+
+    超過 ttl 秒的回應會以 ETag / Last-Modified 發送條件式請求重新驗證，
+    總大小超過 max_bytes 時依最後存取時間淘汰最久未用的回應。
+    """
+
+    def __init__(self, path=".cache/http_cache.sqlite", ttl=6 * 3600, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._db.commit()
+
+    def get(self, key):
+        """
+        取得快取的回應，回傳 (CachedResponse, 是否仍在 ttl 內)，沒有則回傳 (None, False)。
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None, False
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._stats["hits"] += 1
+
+        url, status, headers, body, stored_at = row
+        return CachedResponse(url, status, json.loads(headers), body), time.time() - stored_at < self.ttl
+
+    def put(self, key, url, status_code, headers, content):
+        # 只保留重新驗證與解析需要的 header
+        kept = {k: v for k, v in headers.items() if k.lower() in ("etag", "last-modified", "content-type")}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status_code, json.dumps(kept), content, len(content), now, now)
+            )
+            self._db.commit()
+            self._stats["stored"] += 1
+            if self._stats["stored"] % 100 == 0:
+                self._evict()
+
+    def touch(self, key):
+        """
+        收到 304 Not Modified 後重設回應的儲存時間。
+        """
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._stats["revalidated"] += 1
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到總大小低於上限的 90%
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if freed >= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            freed += size
+            self._stats["evicted"] += 1
+        self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+def has_json_data(response):
+    """
+    104 API 的正常回應：JSON 物件、有 data 且沒有 error。
+    作為 HttpClient.get 的 cacheable，錯誤回應不會被快取。
+    """
+    try:
+        data = response.json()
+    except Exception:
+        return False
+    return isinstance(data, dict) and "error" not in data and "data" in data
+
+def conditional_headers(cached):
+    """
+    由快取回應的 ETag / Last-Modified 組出條件式請求的 headers。
+    """
+    headers = {}
+    etag = cached.headers.get("ETag") or cached.headers.get("etag")
+    last_modified = cached.headers.get("Last-Modified") or cached.headers.get("last-modified")
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+def cache_from_env():
+    """
+    依環境變數建立快取，回傳 (ResponseCache 或 None, mode)。
+    HTTP_CACHE 為 off（預設，不使用）、on（快取並重新驗證）或 replay（只讀快取、不連網）。
+    快取用於開發時重複執行或離線重現，每次命中都會寫入 SQLite，最大 HTTP_CACHE_MAX_MB（預設 512 MB），
+    正式排程維持 off，一律向 104 取得最新資料。
+    """
+    mode = os.getenv("HTTP_CACHE", "off")
+    if mode == "off":
+        return None, mode
+    cache = ResponseCache(
+        path=os.getenv("HTTP_CACHE_PATH", ".cache/http_cache.sqlite"),
+        ttl=float(os.getenv("HTTP_CACHE_TTL", str(6 * 3600))),
+        max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024),
+    )
+    return cache, mode
@@ -0,0 +1,181 @@
+import os
+import threading
+import importlib.util
+import requests
+from requests.adapters import HTTPAdapter
+from .http_cache import CacheMiss, CachedResponse, cache_key, cache_from_env, conditional_headers, has_json_data
+
+def _installed(*modules):
+    return all(importlib.util.find_spec(module) is not None for module in modules)
+
+# 有安裝 brotli 時 urllib3 / httpx 會自動解壓 br 回應
+ACCEPT_ENCODING = "gzip, deflate, br" if _installed("brotli") or _installed("brotlicffi") else "gzip, deflate"
+
+# 所有請求共用的 header 樣板，每次請求只需要補上 Referer
+BASE_HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7,zh-CN;q=0.6,de;q=0.5,fr;q=0.4,ko;q=0.3,ja;q=0.2",
+    "Connection": "keep-alive",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "User-Agent": ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                   "AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/133.0.0.0 Safari/537.36"),
+    "sec-ch-ua": '"Not(A:Brand";v="99", "Google Chrome";v="133", "Chromium";v="133"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"macOS"'
+}
+
+class HttpClient:
+    """
+    列表與詳情爬蟲共用的 HTTP client，以 keep-alive 連線池重複使用連線。
+
+    有安裝 httpx 與 h2 時改用 HTTP/2 多工，否則使用 requests.Session。
+    兩種 backend 的回應都有 status_code、headers、text 與 json()。
+    設定 cache 時會先查詢磁碟快取，replay 模式下完全不連網。
+    """
+
+    def __init__(self, pool_size=10, timeout=10, http2=None, cache=None, cache_mode="on"):
+        if http2 is None:
+            http2 = os.getenv("HTTP2", "auto") != "off" and _installed("httpx", "h2")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.http2 = http2
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "http_versions": {}}
+        self._client = self._build_client(pool_size)
+
+    def _build_client(self, pool_size):
+        if self.http2:
+            import httpx
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            return httpx.Client(http2=True, limits=limits, headers=BASE_HEADERS, timeout=self.timeout)
+        client = requests.Session()
+        client.headers.update(BASE_HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        client.mount("https://", adapter)
+        client.mount("http://", adapter)
+        return client
+
+    def resize(self, pool_size):
+        """
+        以新的連線池大小重建底層連線並關閉舊的連線池。HttpClient 本身不變，
+        已持有它的呼叫端（例如 ListCrawler.client）會直接使用新的連線池，統計也會保留。
+        應在開始發送請求前呼叫。
+        """
+        with self._lock:
+            old_client, self._client = self._client, self._build_client(pool_size)
+            self.pool_size = pool_size
+        old_client.close()
+
+    def get(self, url, params=None, headers=None, timeout=None, limiter=None, cacheable=has_json_data, refresh=False):
+        """
+        發送 GET 請求，headers 只需傳入與樣板不同的部分（例如 Referer）。
+        只有真的要連網時才向 limiter 取得 token，快取命中不佔用請求額度。
+        只有 200 且 cacheable(response) 為真的回應會寫入快取，快取中不符合的舊回應視為沒有快取。
+        cacheable 為 None 時不自動寫入，由呼叫端驗證內容後以 store 寫入。
+        重試時傳入 refresh=True，略過快取直接連網（replay 模式除外）。
+        """
+        key, cached = None, None
+        if self.cache is not None:
+            key = cache_key(url, params)
+            if not refresh or self.cache_mode == "replay":
+                cached, fresh = self.cache.get(key)
+                if cached is not None and cacheable is not None and not cacheable(cached):
+                    cached = None
+            if cached is not None and (fresh or self.cache_mode == "replay"):
+                return cached
+            if self.cache_mode == "replay":
+                raise CacheMiss(f"快取中沒有 {url} 的回應")
+            if cached is not None:
+                headers = {**(headers or {}), **conditional_headers(cached)}
+
+        if limiter is not None:
+            limiter.acquire()
+        response = self._send(url, params, headers, timeout)
+
+        if cached is not None and response.status_code == 304:
+            self.cache.touch(key)
+            return cached
+        if key is not None and response.status_code == 200 and cacheable is not None and cacheable(response):
+            self.cache.put(key, url, response.status_code, response.headers, response.content)
+        return response
+
+    def store(self, url, response, params=None):
+        """
+        將呼叫端已驗證過的回應寫入快取，沒有設定快取或回應本身來自快取時不做任何事。
+        """
+        if self.cache is None or isinstance(response, CachedResponse) or response.status_code != 200:
+            return
+        self.cache.put(cache_key(url, params), url, response.status_code, response.headers, response.content)
+
+    def _send(self, url, params, headers, timeout):
+        try:
+            response = self._client.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+
+        if self.http2:
+            version = response.http_version
+        else:
+            version = {10: "HTTP/1.0", 11: "HTTP/1.1", 20: "HTTP/2"}.get(getattr(response.raw, "version", None), "unknown")
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["http_versions"][version] = self._stats["http_versions"].get(version, 0) + 1
+        return response
+
+    def pool_stats(self):
+        """
+        回傳連線池統計。requests backend 會列出每個主機實際建立的連線數，
+        connections 遠小於 requests 代表連線有被重複使用。
+        """
+        with self._lock:
+            stats = {**self._stats, "http_versions": dict(self._stats["http_versions"])}
+        stats.update({"backend": "httpx/h2" if self.http2 else "requests", "pool_size": self.pool_size})
+
+        if not self.http2:
+            hosts = {}
+            for adapter in set(self._client.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools[key]
+                    hosts[pool.host] = {
+                        "connections": pool.num_connections,
+                        "requests": pool.num_requests,
+                        "idle": pool.pool.qsize() if pool.pool else 0,
+                    }
+            stats["hosts"] = hosts
+        if self.cache is not None:
+            stats["cache"] = {"mode": self.cache_mode, **self.cache.stats()}
+        return stats
+
+    def close(self):
+        self._client.close()
+
+_client = None
+_cache = None
+_client_lock = threading.Lock()
+
+def get_http_client(pool_size=None):
+    """
+    取得共用的 HttpClient。連線池大小預設為 HTTP_POOL_SIZE 環境變數，
+    若呼叫端指定的 pool_size（通常是 worker 數）較大，會以 resize 擴大連線池並關閉舊的連線池。
+    回應快取由 HTTP_CACHE 等環境變數設定，詳見 cache_from_env。
+    """
+    global _client, _cache
+    with _client_lock:
+        if _client is None:
+            if _cache is None:
+                _cache = cache_from_env()
+            cache, cache_mode = _cache
+            _client = HttpClient(pool_size=max(pool_size or 0, int(os.getenv("HTTP_POOL_SIZE", "10"))),
+                                 cache=cache, cache_mode=cache_mode)
+        elif pool_size and _client.pool_size < pool_size:
+            _client.resize(pool_size)
+        return _client
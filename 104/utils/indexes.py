@@ -0,0 +1,196 @@
+import datetime
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from .company_tags import TAG_FIELD, TAGGED_QUERY
+
+# 各集合需要的索引，ensure_indexes 依名稱（沒有指定時為 MongoDB 預設的 欄位_方向）比對並建立或修正
+INDEXES = {
+    # 讀取未關閉的職缺、標記本次沒有出現的職缺
+    "jobs": [
+        IndexModel([("closed", ASCENDING), ("lastSeen", ASCENDING)]),
+    ],
+    # top_500 只讀取有標記的職缺
+    "jobs_detail": [
+        IndexModel([(f"{TAG_FIELD}.rank", ASCENDING)], name="top500_rank",
+                   partialFilterExpression={TAG_FIELD: {"$exists": True}}),
+    ],
+    # app 依公司名稱或年薪排序
+    "jobs_view": [
+        IndexModel([("company", DESCENDING)]),
+        IndexModel([("annualSalary", DESCENDING)]),
+    ],
+    # 搜尋紀錄依表格標題取最新 10 筆
+    "search_history": [
+        IndexModel([("grid_title", ASCENDING), ("timestamp", DESCENDING)]),
+    ],
+    # worker 領取最早加入的項目、heartbeat 延長自己的租約
+    "detail_queue": [
+        IndexModel([("state", ASCENDING), ("enqueuedAt", ASCENDING)]),
+        IndexModel([("state", ASCENDING), ("worker", ASCENDING)]),
+    ],
+}
+
+# 比對既有索引時只看這些選項
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def _index_spec(keys, info):
+    return [(field, direction) for field, direction in keys], {k: info[k] for k in INDEX_OPTIONS if k in info}
+
+def ensure_collection_indexes(collection, models, drop_unknown=False):
+    """
+    讓 collection 的索引符合 models：缺少的建立，名稱相同但欄位或選項不同的重建。
+    drop_unknown 為 True 時刪除沒有宣告的索引（_id 除外）。回傳 {created, dropped}。
+    """
+    existing = collection.index_information()
+    result = {"created": [], "dropped": []}
+    missing = []
+    for model in models:
+        document = model.document
+        name = document["name"]
+        if name in existing:
+            if _index_spec(existing[name]["key"], existing[name]) == _index_spec(document["key"].items(), document):
+                continue
+            collection.drop_index(name)
+            result["dropped"].append(name)
+        missing.append(model)
+    if missing:
+        result["created"] = collection.create_indexes(missing)
+
+    if drop_unknown:
+        declared = {model.document["name"] for model in models}
+        for name in existing:
+            if name != "_id_" and name not in declared and name not in result["dropped"]:
+                collection.drop_index(name)
+                result["dropped"].append(name)
+    return result
+
+# 同一個程序中已確認過索引的資料庫與集合
+_ensured = set()
+
+def ensure_indexes(db, collections=None, drop_unknown=False, force=False):
+    """
+    建立或修正 INDEXES 中宣告的索引，可重複呼叫；每個程序對同一集合只檢查一次（force 時重新檢查）。
+    各程式啟動時呼叫。回傳 {集合: {created, dropped}}，只包含有變動的集合。
+    """
+    changes = {}
+    for name in collections or INDEXES:
+        key = (db.name, name)
+        if key in _ensured and not force:
+            continue
+        result = ensure_collection_indexes(db[name], INDEXES[name], drop_unknown=drop_unknown)
+        _ensured.add(key)
+        if result["created"] or result["dropped"]:
+            changes[name] = result
+    for name, result in changes.items():
+        print(f"{name} 索引更新：建立 {result['created']}，刪除 {result['dropped']}")
+    return changes
+
+def profiled_queries():
+    """
+    專案中主要的查詢，profile_queries 會逐一 explain。
+    每項為 (說明, 集合, find 條件或 aggregate pipeline, sort)。
+    """
+    from .jobs_view import jobs_view_pipeline
+    from .top_500 import tagged_jobs_pipeline
+    now = datetime.datetime.now()
+    return [
+        ("未關閉的職缺", "jobs", {"closed": {"$ne": True}}, None),
+        ("標記關閉的職缺", "jobs", {"lastSeen": {"$not": {"$gte": now}}, "closed": {"$ne": True}}, None),
+        ("jobs_view 依公司排序", "jobs_view", {}, [("company", DESCENDING)]),
+        ("jobs_view 依年薪排序", "jobs_view", {}, [("annualSalary", DESCENDING)]),
+        ("搜尋紀錄", "search_history", {"grid_title": ""}, [("timestamp", DESCENDING)]),
+        ("領取佇列項目", "detail_queue", {"state": "pending"}, [("enqueuedAt", ASCENDING)]),
+        ("前五百大標記", "jobs_detail", TAGGED_QUERY, None),
+        ("前五百大職缺", "jobs_detail", tagged_jobs_pipeline(), None),
+        ("產生 jobs_view", "jobs_detail", jobs_view_pipeline(), None),
+    ]
+
+def _plan_stages(plan):
+    """
+    依序列出查詢計畫中的 stage（例如 IXSCAN、FETCH、COLLSCAN）。
+    """
+    stages = []
+    while plan:
+        stage = plan.get("stage")
+        if stage:
+            stages.append(stage if "indexName" not in plan else f"{stage}({plan['indexName']})")
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+    return stages
+
+def summarize_explain(explain):
+    """
+    從 explain 的結果取出查詢計畫與執行統計：stages、nReturned、keysExamined、docsExamined、millis。
+    aggregate 的 explain 取第一個 $cursor 階段。
+    """
+    if "stages" in explain:
+        explain = explain["stages"][0].get("$cursor", {})
+    elif "shards" in explain:
+        explain = next(iter(explain["shards"].values()))
+    planner = explain.get("queryPlanner", {})
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": _plan_stages(planner.get("winningPlan", {})),
+        "nReturned": stats.get("nReturned"),
+        "keysExamined": stats.get("totalKeysExamined"),
+        "docsExamined": stats.get("totalDocsExamined"),
+        "millis": stats.get("executionTimeMillis"),
+    }
+
+def explain_query(db, collection, query, sort=None):
+    """
+    以 executionStats 模式 explain 一個 find 條件或 aggregate pipeline，回傳 summarize_explain 的結果。
+    """
+    if isinstance(query, list):
+        command = {"aggregate": collection, "pipeline": query, "cursor": {}}
+    else:
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+    explain = db.command("explain", command, verbosity="executionStats")
+    return summarize_explain(explain)
+
+def profile_queries(db):
+    """
+    explain 專案中的每個主要查詢，回傳 [{name, collection, stages, nReturned, ...}]，
+    可比較前後數字確認索引有被使用。
+    """
+    report = []
+    for name, collection, query, sort in profiled_queries():
+        try:
+            summary = explain_query(db, collection, query, sort)
+        except OperationFailure as e:
+            summary = {"error": str(e)}
+        report.append({"name": name, "collection": collection, **summary})
+    return report
+
+def enable_profiling(db, slow_ms=100):
+    """
+    開啟 MongoDB profiler，記錄超過 slow_ms 毫秒的查詢。Atlas 共用叢集等沒有權限時回傳 False。
+    """
+    try:
+        db.command("profile", 1, slowms=slow_ms)
+        return True
+    except OperationFailure as e:
+        print(f"無法開啟 profiler：{e}")
+        return False
+
+def slow_query_stats(db, limit=20):
+    """
+    彙整 system.profile 中的慢查詢，依集合與操作類型分組，回傳次數、平均與最長毫秒數。
+    """
+    pipeline = [
+        {"$group": {
+            "_id": {"ns": "$ns", "op": "$op", "plan": "$planSummary"},
+            "count": {"$sum": 1},
+            "avgMillis": {"$avg": "$millis"},
+            "maxMillis": {"$max": "$millis"},
+            "docsExamined": {"$sum": "$docsExamined"},
+        }},
+        {"$sort": {"maxMillis": -1}},
+        {"$limit": limit},
+    ]
+    try:
+        return list(db["system.profile"].aggregate(pipeline))
+    except OperationFailure as e:
+        print(f"無法讀取 system.profile：{e}")
+        return []
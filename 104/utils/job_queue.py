@@ -0,0 +1,166 @@
+import os
+import time
+import socket
+import datetime
+import threading
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from .get_jobs import ajax_url_from_job
+from .detail_pipeline import run_detail_pipeline
+
+class DetailQueue:
+    """
+    職缺詳情的工作佇列，存在 MongoDB 的 detail_queue 集合中，每個職缺 URL 一筆。
+
+    狀態流程為 pending → leased → done / failed。worker 以 find_one_and_update 原子地領取項目，
+    領取後取得 lease_seconds 秒的租約，期間需定期 heartbeat 延長；
+    worker 中斷而租約過期的項目會被其他 worker 重新領取，超過 max_attempts 次則標記為 failed。
+    多個 worker 程序或容器可以同時處理同一個佇列。
+    """
+
+    def __init__(self, collection, lease_seconds=300, max_attempts=3):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _lease_until(self):
+        return datetime.datetime.now() + datetime.timedelta(seconds=self.lease_seconds)
+
+    def active_count(self):
+        """
+        尚未完成（pending 或 leased）的項目數。
+        """
+        return self.collection.count_documents({"state": {"$in": ["pending", "leased"]}})
+
+    def reset(self):
+        self.collection.delete_many({})
+
+    def enqueue(self, fingerprints):
+        """
+        加入 {職缺 URL: 列表指紋}，已在佇列中的 URL 會被略過。
+        """
+        now = datetime.datetime.now()
+        documents = [
+            {"_id": url, "fingerprint": fingerprint, "state": "pending", "attempts": 0, "enqueuedAt": now}
+            for url, fingerprint in fingerprints.items()
+        ]
+        if not documents:
+            return 0
+        try:
+            return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+
+    def claim(self, worker_id):
+        """
+        領取一個 pending 或租約已過期的項目，沒有可領取的項目時回傳 None。
+        """
+        now = datetime.datetime.now()
+        return self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"state": "pending"},
+                    {"state": "leased", "leaseUntil": {"$lt": now}},
+                ],
+                "attempts": {"$lt": self.max_attempts},
+            },
+            {
+                "$set": {"state": "leased", "worker": worker_id, "leaseUntil": self._lease_until()},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("enqueuedAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, worker_id):
+        """
+        延長該 worker 目前持有的所有租約。
+        """
+        self.collection.update_many(
+            {"state": "leased", "worker": worker_id},
+            {"$set": {"leaseUntil": self._lease_until()}}
+        )
+
+    def complete(self, urls, worker_id=None):
+        query = {"_id": {"$in": list(urls)}}
+        if worker_id is not None:
+            query["worker"] = worker_id
+        self.collection.update_many(query, {"$set": {"state": "done", "finishedAt": datetime.datetime.now()}})
+
+    def fail(self, url, error=None, worker_id=None):
+        """
+        單筆失敗時，還沒用完嘗試次數就放回 pending，否則標記為 failed。
+        指定 worker_id 時只更新該 worker 仍持有的項目，租約已過期、被其他 worker 領走的項目不受影響。
+        """
+        query = {"_id": url}
+        if worker_id is not None:
+            query["worker"] = worker_id
+        for state, attempts in (("failed", {"$gte": self.max_attempts}), ("pending", {"$lt": self.max_attempts})):
+            result = self.collection.update_one(
+                {**query, "attempts": attempts},
+                {"$set": {"state": state, "error": error}, "$unset": {"worker": ""}}
+            )
+            if result.matched_count:
+                return
+
+    def release_expired(self):
+        """
+        將租約過期且已用完嘗試次數的項目標記為 failed，避免它們永遠停留在 leased。
+        """
+        self.collection.update_many(
+            {"state": "leased", "leaseUntil": {"$lt": datetime.datetime.now()}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"state": "failed", "error": "lease expired"}}
+        )
+
+    def clear_finished(self):
+        """
+        清除 done 與 failed 項目，下次執行重新計算需要爬取的職缺。
+        """
+        self.collection.delete_many({"state": {"$in": ["done", "failed"]}})
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_queue_worker(queue, detail_collection, worker_id=None, max_workers=5, batch_size=50, queue_size=100,
+                     poll_seconds=1.0):
+    """
+    持續從 DetailQueue 領取職缺，以串流管線爬取並寫入 jobs_detail，直到佇列中沒有未完成的項目。
+    暫時領不到項目但仍有處理中的項目時，每 poll_seconds 秒再領取一次，
+    失敗後放回 pending 的項目與其他 worker 過期的租約都會在同一次執行中處理。
+    背景執行緒每 lease_seconds / 3 秒 heartbeat 一次，讓處理中與等待寫入的項目保持租約。
+    """
+    worker_id = worker_id or default_worker_id()
+    fingerprints = {}
+    stop = threading.Event()
+
+    def claimed_ajax_urls():
+        while True:
+            item = queue.claim(worker_id)
+            if item is None:
+                queue.release_expired() # 已用完嘗試次數的過期租約不會再被領取，先標記為 failed
+                if not queue.active_count():
+                    return
+                time.sleep(poll_seconds)
+                continue
+            fingerprints[item["_id"]] = item.get("fingerprint")
+            yield ajax_url_from_job(item["_id"])
+
+    def keep_leases():
+        while not stop.wait(queue.lease_seconds / 3):
+            queue.heartbeat(worker_id)
+
+    heartbeat = threading.Thread(target=keep_leases, daemon=True)
+    heartbeat.start()
+    try:
+        stats = run_detail_pipeline(
+            detail_collection, claimed_ajax_urls(), max_workers=max_workers, queue_size=queue_size,
+            batch_size=batch_size, fingerprints=fingerprints,
+            on_written=lambda urls: queue.complete(urls, worker_id),
+            on_failed=lambda url, error: queue.fail(url, str(error), worker_id),
+        )
+    finally:
+        stop.set()
+        heartbeat.join()
+    queue.release_expired()
+    stats["worker"] = worker_id
+    return stats
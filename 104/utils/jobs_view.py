@@ -0,0 +1,44 @@
+from .connect_db import jobs_detail_project, jobs_condition
+from .sync_jobs import sync_timestamp
+from .indexes import ensure_indexes
+
+VIEW_COLLECTION = "jobs_view"
+
+def jobs_view_pipeline():
+    """
+    app 使用的欄位投影與職缺篩選，保留 _id 以便 $merge 到 jobs_view。
+    """
+    project = jobs_detail_project()
+    project['$project'] = {k: v for k, v in project['$project'].items() if k != '_id'}
+    return [project, jobs_condition()]
+
+def refresh_jobs_view(db):
+    """
+    在 MongoDB 端以 $merge 將 jobs_detail 投影、篩選後的結果寫入 jobs_view，
+    再刪除本次沒有被寫入的文件（已關閉或被篩選掉的職缺）。回傳 jobs_view 的文件數。
+    """
+    now = sync_timestamp()
+    pipeline = jobs_view_pipeline() + [
+        {'$addFields': {'refreshedAt': now}},
+        {'$merge': {'into': VIEW_COLLECTION, 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+    ]
+    db["jobs_detail"].aggregate(pipeline, allowDiskUse=True)
+
+    view = db[VIEW_COLLECTION]
+    view.delete_many({'refreshedAt': {'$lt': now}})
+    ensure_indexes(db, [VIEW_COLLECTION])
+    return view.count_documents({})
+
+def find_jobs_view(db, query=None):
+    """
+    以 company 遞減排序讀取 jobs_view，回傳格式與原本的 aggregate 結果相同。
+    jobs_view 尚未建立時退回即時 aggregate jobs_detail。
+    """
+    view = db[VIEW_COLLECTION]
+    if view.estimated_document_count() == 0:
+        pipeline = jobs_view_pipeline() + [{'$project': {'_id': 0}}]
+        if query:
+            pipeline.append({'$match': query})
+        pipeline.append({'$sort': {'company': -1}})
+        return db["jobs_detail"].aggregate(pipeline, allowDiskUse=True)
+    return view.find(query or {}, {'_id': 0, 'refreshedAt': 0}).sort('company', -1)
@@ -1,65 +1,81 @@
 import json
-import time
 import random
-import requests
 from urllib.parse import quote_plus
+from .http_client import get_http_client
+from .rate_limiter import get_rate_limiter, parse_retry_after
 
-def list_jobs_by_area(area_id, page=1, jobs_list=None):
+# URL 參數
+BASE_URL = "https://www.104.com.tw/jobs/search/api/jobs"
+JOBSOURCE = "joblist_search"
+KEYWORD_RAW = "python, AI, 數據"
+MODE = "s"
+PAGESIZE = 500
+
+def build_list_request(area_id, page=1):
     """
-    針對單一區域，遞迴取得該區域所有分頁的職缺資料。
+    組出單一區域、單一分頁的查詢參數與該次請求專屬的 headers。
     """
-    if jobs_list is None: jobs_list = []
-    
-    # URL 參數
-    base_url = "https://www.104.com.tw/jobs/search/api/jobs"
-    jobsource = "joblist_search"
-    keyword_raw = "python, AI, 數據"
-    keyword = quote_plus(keyword_raw)
-    mode = "s"
-    pagesize = 500
+    keyword = quote_plus(KEYWORD_RAW)
 
     params = {
         "area": area_id,
-        "jobsource": jobsource,
-        "keyword": keyword_raw,
-        "mode": mode,
+        "jobsource": JOBSOURCE,
+        "keyword": KEYWORD_RAW,
+        "mode": MODE,
         "page": page,
-        "pagesize": pagesize
+        "pagesize": PAGESIZE
     }
 
     referer = (
-        f"https://www.104.com.tw/jobs/search/?jobsource={jobsource}"
-        f"&keyword={keyword}&mode={mode}&order=15&page={page}"
-        f"&area={area_id}&pagesize={pagesize}&version={random.randint(1, 1000)}"
+        f"https://www.104.com.tw/jobs/search/?jobsource={JOBSOURCE}"
+        f"&keyword={keyword}&mode={MODE}&order=15&page={page}"
+        f"&area={area_id}&pagesize={PAGESIZE}&version={random.randint(1, 1000)}"
     )
 
-    # HTTP request headers
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7,zh-CN;q=0.6,de;q=0.5,fr;q=0.4,ko;q=0.3,ja;q=0.2",
-        "Connection": "keep-alive",
-        "Referer": referer,
-        "Sec-Fetch-Dest": "empty",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Site": "same-origin",
-        "User-Agent": ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/133.0.0.0 Safari/537.36"),
-        "sec-ch-ua": '"Not(A:Brand";v="99", "Google Chrome";v="133", "Chromium";v="133"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"macOS"'
-    }
+    # 其餘 HTTP request headers 由共用 HttpClient 的樣板提供
+    headers = {"Referer": referer}
+    return params, headers
+
+def unique_jobs(jobs_list, set_id=False):
+    """
+    以 link 作為職缺 ID 去除重複職缺，保留第一次出現的順序。
+    set_id 為 True 時，同時將 ID 寫入 _id 欄位。
+    """
+    seen_jobs, unique = set(), []
+    for job in jobs_list:
+        job_id = job["link"]["job"]
+        if job_id not in seen_jobs:
+            seen_jobs.add(job_id)
+            if set_id: job["_id"] = job_id
+            unique.append(job)
+    return unique
+
+def list_jobs_by_area(area_id, page=1, jobs_list=None, refresh=False):
+    """
+    針對單一區域，遞迴取得該區域所有分頁的職缺資料。重試時以 refresh 略過快取。
+    """
+    if jobs_list is None: jobs_list = []
+    params, headers = build_list_request(area_id, page)
+    limiter = get_rate_limiter()
 
     print(f"爬取第 {page} 頁: ", end=" ")
-    response = requests.get(base_url, headers=headers, params=params)
+    response = get_http_client().get(BASE_URL, params=params, headers=headers, limiter=limiter, refresh=refresh)
+
+    # 被限流時降低共用速率後重試
+    if response.status_code == 429:
+        print("收到 429 回應，降低速率後重試...")
+        limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        return list_jobs_by_area(area_id, page, jobs_list, refresh=True)
+
     data = response.json()
     print(response.text[:22] + "..." + response.text[-20:])
 
-    # 出現錯誤則 10 秒後重試一次
+    # 出現錯誤則降低速率後重試
     if "error" in data:
-        print("發生錯誤，3 秒後重試...")
-        time.sleep(3)
-        return list_jobs_by_area(area_id, page, jobs_list)
+        print("發生錯誤，降低速率後重試...")
+        limiter.on_throttle()
+        return list_jobs_by_area(area_id, page, jobs_list, refresh=True)
+    limiter.on_success()
     
     # 取得該頁資料
     try: jobs = data["data"] 
@@ -74,17 +90,10 @@ def list_jobs_by_area(area_id, page=1, jobs_list=None):
     last_page = pagination.get("lastPage", page)
 
     if current_page < last_page:
-        time.sleep(2) # 等待 2 秒以防止過快連續請求
         return list_jobs_by_area(area_id, current_page + 1, jobs_list)
     else:
         # 當所有分頁取回後，將 link 作為 ID，並回傳職缺資料以及預計數量
-        seen_jobs, unique_jobs = set(), []
-        for job in jobs_list:
-            job_id = job["link"]["job"]
-            if job_id not in seen_jobs:
-                seen_jobs.add(job_id)
-                unique_jobs.append(job)
-        return unique_jobs, expected_total
+        return unique_jobs(jobs_list), expected_total
 
 def list_jobs(areas, index=0, all_jobs=None):
     """
@@ -96,14 +105,7 @@ def list_jobs(areas, index=0, all_jobs=None):
 
     # 終止條件：當 index 超過陣列長度，就回傳結果
     if index >= len(areas): 
-        seen_jobs, unique_jobs = set(), []
-        for job in all_jobs:
-            job_id = job["link"]["job"]
-            if job_id not in seen_jobs:
-                seen_jobs.add(job_id)
-                job["_id"] = job_id
-                unique_jobs.append(job)
-        return unique_jobs
+        return unique_jobs(all_jobs, set_id=True)
 
     area_keys = list(areas.keys())
     current_area_id = area_keys[index]
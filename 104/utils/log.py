@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import logging
+import datetime
+
+# 以 LOG_LEVEL 環境變數控制輸出等級，預設 INFO；逐筆的紀錄用 DEBUG
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+class JsonFormatter(logging.Formatter):
+    """
+    每筆紀錄輸出成一行 JSON：time、level、logger、event 與 log_event 傳入的欄位。
+    """
+
+    def format(self, record):
+        payload = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+def get_logger(name):
+    """
+    取得輸出到 stdout 的 logger，每行一筆 JSON，方便 cron log 以工具篩選。
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+    return logger
+
+def log_event(logger, level, event, **fields):
+    """
+    記錄一個事件與它的欄位。等級未開啟時直接返回，不會組出訊息。
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
@@ -0,0 +1,206 @@
+import re
+from functools import lru_cache
+from .search_index import parse_term, get_search_index
+
+# 語法樹節點皆為 tuple，可直接當作 dict key 做 memoize：
+#   ("term", 欄位或 None, 搜尋詞)、("not", 子節點)、("and", 子節點...)、("or", 子節點...)
+
+# 搜尋語法版本，存在搜尋紀錄中。第 2 版起 & 優先於 |，並可用括號分組
+QUERY_SYNTAX = 2
+
+class QuerySyntaxError(ValueError):
+    pass
+
+def _tokenize(query):
+    """
+    將搜尋字串切成 &、|、(、)、! 運算子與搜尋詞。
+    ! 只有在搜尋詞開頭或括號前才是運算子，搜尋詞中間的字元保持原樣。
+    """
+    tokens = []
+    for piece in re.split(r'([&|()])', query):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if piece in "&|()":
+            tokens.append(piece)
+            continue
+        while piece.startswith('!'):
+            tokens.append('!')
+            piece = piece[1:].strip()
+        if piece:
+            tokens.append(("term", piece))
+    return tokens
+
+def _term_node(text):
+    is_not, field, term = parse_term(text)
+    node = ("term", field, term)
+    return ("not", node) if is_not else node
+
+class _Parser:
+    """
+    遞迴下降解析，優先順序為 ! > & > |，括號可改變順序。
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"多餘的 {self.peek()!r}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == '|':
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else ("or", *children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() == '&':
+            self.take()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else ("and", *children)
+
+    def parse_not(self):
+        if self.peek() == '!':
+            self.take()
+            return ("not", self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.take()
+        if token == '(':
+            node = self.parse_or()
+            if self.take() != ')':
+                raise QuerySyntaxError("括號沒有成對")
+            return node
+        if isinstance(token, tuple):
+            return _term_node(token[1])
+        if token is None:
+            raise QuerySyntaxError("搜尋字串結尾缺少搜尋詞")
+        raise QuerySyntaxError(f"預期搜尋詞，但遇到 {token!r}")
+
+@lru_cache(maxsize=256)
+def compile_query(query):
+    """
+    將搜尋字串編譯成語法樹，同一個搜尋字串只解析一次。空字串回傳 None。
+
+    沒有 &、|、括號時沿用原本的規則，以 , ， 、 分隔的每個搜尋詞都必須符合。
+    """
+    if not re.search(r'[&|()]', query):
+        terms = [term.strip() for term in re.split(r'[,，、]', query) if term.strip()]
+        nodes = [_term_node(term) for term in terms]
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else ("and", *nodes)
+
+    tokens = _tokenize(query)
+    if not tokens:
+        return None
+    return _Parser(tokens).parse()
+
+def upgrade_legacy_query(query):
+    """
+    將第 1 版的搜尋字串改寫成意義相同的新語法。
+    第 1 版先以 & 切開、每段再以 | 切開，等於 | 優先於 &，例如 a | b & c 代表 (a | b) & c；
+    只有同時含 & 與 | 的搜尋字串需要加上括號。第 1 版的括號是一般字元，含括號的搜尋字串無法改寫，維持原樣。
+    """
+    if "&" not in query or "|" not in query or re.search(r'[()]', query):
+        return query
+    groups = []
+    for group in query.split("&"):
+        terms = [term.strip() for term in group.split("|") if term.strip()]
+        if len(terms) > 1:
+            groups.append("(" + " | ".join(terms) + ")")
+        elif terms:
+            groups.append(terms[0])
+    return " & ".join(groups)
+
+class QueryExecutor:
+    """
+    在 SearchIndex 上執行語法樹。
+
+    AND 依估計的符合列數由少到多執行，後面的子句只檢查前面留下的列；
+    OR 已符合的列不再檢查；相同的子節點在同一次查詢中只計算一次。
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.memo = {}
+
+    def estimate(self, node):
+        kind = node[0]
+        if kind == "term":
+            return self.index.estimate(node[1], node[2])
+        if kind == "not":
+            return self.index.size - self.estimate(node[1])
+        if kind == "and":
+            return min(self.estimate(child) for child in node[1:])
+        return min(self.index.size, sum(self.estimate(child) for child in node[1:]))
+
+    def run(self, node, within):
+        # 相同節點若先前已在包含 within 的列範圍內算過，直接取交集
+        cached = self.memo.get(node)
+        if cached is not None and within & ~cached[0] == 0:
+            return cached[1] & within
+
+        kind = node[0]
+        if kind == "term":
+            result = self.index.match(node[1], node[2], within)
+        elif kind == "not":
+            result = within & ~self.run(node[1], within)
+        elif kind == "and":
+            result = within
+            for child in sorted(node[1:], key=self.estimate):
+                result = self.run(child, result)
+                if not result:
+                    break
+        else:
+            result, remaining = 0, within
+            for child in node[1:]:
+                matched = self.run(child, remaining)
+                result |= matched
+                remaining &= ~matched
+                if not remaining:
+                    break
+
+        self.memo[node] = (within, result)
+        return result
+
+def query_bits(index, query, max_cached=64):
+    """
+    回傳符合搜尋字串的列 bitset，結果依搜尋字串快取在索引上，重複查詢不需重新計算。
+    """
+    with index.query_lock:
+        cached = index.query_cache.get(query)
+    if cached is not None:
+        return cached
+
+    plan = compile_query(query)
+    bits = index.all_bits if plan is None else QueryExecutor(index).run(plan, index.all_bits)
+    with index.query_lock:
+        while len(index.query_cache) >= max_cached:
+            index.query_cache.pop(next(iter(index.query_cache)))
+        index.query_cache[query] = bits
+    return bits
+
+def filter_by_query(data, query):
+    """
+    以搜尋字串篩選 data，支援 欄位:搜尋詞、&、|、! 與括號。
+    """
+    if not query:
+        return data
+    index = get_search_index(data)
+    return data[index.to_mask(query_bits(index, query))]
@@ -0,0 +1,113 @@
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+# 收到 429 但沒有（或無法解析）Retry-After 時，暫停所有爬蟲請求的秒數
+DEFAULT_RETRY_AFTER = 30.0
+
+class RateLimiter:
+    """
+    Token bucket 限流器，以 AIMD 方式自動調整速率，多個執行緒共用同一個實例
+    （asyncio 列表爬蟲也是在 executor 執行緒中呼叫 acquire）。
+
+    每次成功的請求讓速率增加 increase（加法增加），收到 429 時速率乘上 decrease（乘法減少），
+    若回應帶有 Retry-After，則在該時間之前暫停發放 token。
+    clock 與 sleep 預設為 time.monotonic 與 time.sleep，測試時可替換。
+    """
+
+    def __init__(self, rate=4.0, burst=4, min_rate=0.5, max_rate=16.0, increase=0.05, decrease=0.5, jitter=0.1,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._stats = {"acquired": 0, "successes": 0, "throttled": 0, "waited_seconds": 0.0}
+
+    def _reserve(self):
+        """
+        預約一個 token，回傳需要等待的秒數。token 可以是負數，代表已被預約的額度。
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            wait = max(wait, self._blocked_until - now)
+            if wait > 0:
+                wait += random.uniform(0, self.jitter)
+
+            self._stats["acquired"] += 1
+            self._stats["waited_seconds"] += wait
+            return wait
+
+    def acquire(self):
+        """
+        阻塞直到取得 token。
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self._stats["successes"] += 1
+
+    def on_throttle(self, retry_after=None):
+        """
+        收到 429 或其他限流訊號時呼叫，retry_after 為伺服器要求等待的秒數。
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._stats["throttled"] += 1
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, self.clock() + retry_after)
+
+    def metrics(self):
+        with self._lock:
+            return {**self._stats, "rate": round(self.rate, 3), "tokens": round(self._tokens, 3)}
+
+def parse_retry_after(value, default=DEFAULT_RETRY_AFTER, now=None):
+    """
+    解析 Retry-After header，支援秒數與 HTTP 日期兩種格式，沒有或無法解析時回傳 default。
+    now 為目前的 Unix 時間，預設為 time.time()。
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (time.time() if now is None else now))
+    except (TypeError, ValueError):
+        return default
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(name="www.104.com.tw"):
+    """
+    取得指定名稱共用的限流器，列表與詳情爬蟲使用同一個實例。
+    初始速率與上限可由 RATE_LIMIT_RPS、RATE_LIMIT_MAX_RPS 環境變數設定。
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            rate = float(os.getenv("RATE_LIMIT_RPS", "4"))
+            max_rate = float(os.getenv("RATE_LIMIT_MAX_RPS", "16"))
+            _limiters[name] = RateLimiter(rate=rate, burst=max(1, int(rate)), max_rate=max_rate)
+        return _limiters[name]
@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+
+# jobs_detail 中存放解析後薪資的欄位
+SALARY_FIELD = "_salary"
+
+# 換算年薪的工時假設，可用環境變數調整
+HOURS_PER_DAY = float(os.getenv("SALARY_HOURS_PER_DAY", "8"))
+DAYS_PER_YEAR = float(os.getenv("SALARY_DAYS_PER_YEAR", "250"))
+MONTHS_PER_YEAR = float(os.getenv("SALARY_MONTHS_PER_YEAR", "12"))
+
+# 薪資文字開頭的計薪單位；文字沒有單位時依 salaryType 判斷
+UNIT_WORDS = {"時薪": "hourly", "日薪": "daily", "月薪": "monthly", "年薪": "yearly", "論件": "piece"}
+TYPE_UNITS = {10: "negotiable", 50: "monthly", 60: "yearly"}
+
+UNIT_PATTERN = "(" + "|".join(UNIT_WORDS) + ")"
+# 第一個數字為下限，~ 之後的數字為上限，數字後面可接「萬」（中間可有空白），
+# 分隔符號前也可先出現「元」，如「40000元-50000元」
+RANGE_PATTERN = r"(?P<low>\d+(?:\.\d+)?)\s*(?P<low_wan>萬)?元?(?:\s*[~～\-至]\s*(?P<high>\d+(?:\.\d+)?)\s*(?P<high_wan>萬)?)?"
+
+def annual_multipliers():
+    return {
+        "hourly": HOURS_PER_DAY * DAYS_PER_YEAR,
+        "daily": DAYS_PER_YEAR,
+        "monthly": MONTHS_PER_YEAR,
+        "yearly": 1.0,
+    }
+
+def _amount(numbers, wan):
+    return numbers.astype(float).to_numpy() * np.where(wan.notna().to_numpy(), 10000, 1)
+
+def parse_salaries(salaries, salary_types):
+    """
+    批次解析 104 的薪資文字（jobDetail.salary）與 salaryType，以 pandas 向量化的正規表示式一次處理整批。
+
+    回傳與輸入等長的 list，每個元素為：
+        unit: hourly / daily / monthly / yearly / piece / negotiable / None
+        min、max、mid: 原單位的金額，「以上」沒有上限時 max 為 None
+        annualMin、annualMax、annual: 換算成年薪，無法換算（論件、面議未註明金額）時為 None
+        negotiable: 是否為面議
+    """
+    text = pd.Series(list(salaries), dtype=object).fillna("").astype(str).str.replace(",", "", regex=False)
+    types = pd.to_numeric(pd.Series(list(salary_types), dtype=object), errors="coerce")
+
+    unit = text.str.extract(UNIT_PATTERN, expand=False).map(UNIT_WORDS)
+    negotiable = text.str.contains("面議", regex=False).to_numpy() | (types == 10).to_numpy()
+    unit = unit.where(unit.notna(), types.map(TYPE_UNITS)).to_numpy(dtype=object)
+    unit[negotiable & pd.isna(unit)] = "negotiable"
+
+    parts = text.str.extract(RANGE_PATTERN)
+    low = _amount(parts["low"], parts["low_wan"])
+    high = _amount(parts["high"], parts["high_wan"])
+    open_ended = text.str.contains("以上", regex=False).to_numpy()
+    high = np.where(np.isnan(high) & ~open_ended, low, high)
+    mid = np.where(np.isnan(high), low, (low + high) / 2)
+
+    # 面議通常註明月薪下限（例如「經常性薪資達4萬元以上」），以月薪換算
+    unit[negotiable & ~np.isnan(low)] = "monthly"
+    multipliers = pd.Series(unit).map(annual_multipliers()).astype(float).to_numpy()
+
+    annual = mid * multipliers
+    # 面議未註明金額時與原本的 annualSalary 相同，以 0 排序
+    annual = np.where(negotiable & np.isnan(annual), 0, annual)
+    frame = pd.DataFrame({
+        "unit": unit, "negotiable": negotiable,
+        "min": low, "max": high, "mid": mid,
+        "annualMin": low * multipliers, "annualMax": high * multipliers, "annual": annual,
+    }).round(2)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict("records")
+
+def parse_salary(salary, salary_type=None):
+    """
+    解析單筆薪資，格式同 parse_salaries。
+    """
+    return parse_salaries([salary], [salary_type])[0]
+
+def tag_salaries(job_details):
+    """
+    寫入 jobs_detail 前呼叫，將一批職缺詳情的薪資解析結果存到 _salary。
+    """
+    job_details = list(job_details)
+    salaries = [doc.get("jobDetail", {}).get("salary") for doc in job_details]
+    salary_types = [doc.get("jobDetail", {}).get("salaryType") for doc in job_details]
+    for doc, parsed in zip(job_details, parse_salaries(salaries, salary_types)):
+        doc[SALARY_FIELD] = parsed
+    return job_details
+
+def backfill_salaries(collection, batch_size=1000):
+    """
+    重新解析 collection 中所有職缺詳情的薪資，只更新結果有變動的文件。回傳 {scanned, changed}。
+    """
+    stats = {"scanned": 0, "changed": 0}
+    projection = {"jobDetail.salary": 1, "jobDetail.salaryType": 1, SALARY_FIELD: 1}
+
+    def flush(batch):
+        old = [doc.get(SALARY_FIELD) for doc in batch]
+        operations = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {SALARY_FIELD: doc[SALARY_FIELD]}})
+            for doc, previous in zip(tag_salaries(batch), old) if doc[SALARY_FIELD] != previous
+        ]
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        stats["scanned"] += len(batch)
+        stats["changed"] += len(operations)
+
+    batch = []
+    for doc in collection.find({}, projection):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return stats
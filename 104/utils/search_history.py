@@ -0,0 +1,152 @@
+import json
+import time
+import queue
+import atexit
+import hashlib
+import datetime
+import threading
+from pymongo import UpdateOne
+from .connect_db import connect_db
+from .query_planner import QUERY_SYNTAX, upgrade_legacy_query
+
+def search_id(record):
+    """
+    搜尋紀錄的 _id：除了 timestamp、syntax 以外的欄位的 MD5，同樣的搜尋只保留一筆。
+    """
+    record_str = json.dumps({k: v for k, v in record.items() if k not in ("_id", "timestamp", "syntax")}, sort_keys=True)
+    return hashlib.md5(record_str.encode()).hexdigest()
+
+class SearchHistory:
+    """
+    search_history 集合的讀寫，讓 display_job_grid 不需要等待資料庫。
+
+    寫入：record() 立即更新記憶體中的最近紀錄，再交給背景執行緒，
+    每 flush_interval 秒或累積 batch_size 筆時以一次 bulk_write 的 upsert 寫入。
+    讀取：每個 grid_title 的最近 limit 筆快取在程序中，超過 refresh_seconds 秒才重新查詢，
+    以取得其他程序寫入的紀錄；尚未寫入的紀錄會合併回查詢結果。
+    """
+
+    def __init__(self, collection, limit=10, flush_interval=1.0, batch_size=100, refresh_seconds=60):
+        self.collection = collection
+        self.limit = limit
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.recent_cache = {}
+        self.pending = {}
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _upgrade(self, record):
+        # 沒有 syntax 的紀錄是以第 1 版語法（| 優先於 &）儲存，改寫成新語法後才重新套用
+        if record.get("syntax") == QUERY_SYNTAX:
+            return record
+        return {**record, "search_query": upgrade_legacy_query(record["search_query"]), "syntax": QUERY_SYNTAX}
+
+    def _merge(self, title, records):
+        # 依 _id 去除重複並保留最新的時間，再依時間排序取前 limit 筆
+        merged = {}
+        for record in records:
+            if record["grid_title"] != title:
+                continue
+            previous = merged.get(record["_id"])
+            if previous is None or record["timestamp"] > previous["timestamp"]:
+                merged[record["_id"]] = record
+        ordered = sorted(merged.values(), key=lambda record: record["timestamp"], reverse=True)
+        return ordered[:self.limit]
+
+    def recent(self, title):
+        """
+        回傳 title 最近的搜尋紀錄（依時間新到舊），舊語法的搜尋字串會改寫成新語法。
+        """
+        with self.lock:
+            entry = self.recent_cache.get(title)
+            if entry is not None and time.monotonic() - entry["loaded"] < self.refresh_seconds:
+                return list(entry["records"])
+
+        records = [self._upgrade(record) for record in
+                   self.collection.find({"grid_title": title}).sort("timestamp", -1).limit(self.limit)]
+        with self.lock:
+            records = self._merge(title, records + list(self.pending.values()))
+            self.recent_cache[title] = {"records": records, "loaded": time.monotonic()}
+            return list(records)
+
+    def record(self, title, search_query, result_count):
+        """
+        記錄一次搜尋，不等待資料庫寫入。回傳搜尋紀錄。
+        """
+        record = {
+            "grid_title": title,
+            "search_query": search_query,
+            "timestamp": datetime.datetime.now(),
+            "result_count": result_count,
+            "syntax": QUERY_SYNTAX,
+        }
+        record["_id"] = search_id(record)
+        with self.lock:
+            self.pending[record["_id"]] = record
+            entry = self.recent_cache.get(title)
+            if entry is not None:
+                entry["records"] = self._merge(title, [record] + entry["records"])
+        self.writes.put(record)
+        return record
+
+    def _write_loop(self):
+        while True:
+            batch = [self.writes.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.writes.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"寫入搜尋紀錄時發生錯誤：{e}")
+            finally:
+                for _ in batch:
+                    self.writes.task_done()
+
+    def _write(self, batch):
+        # 同一批中重複的搜尋只寫入最新一筆；已存在時只更新時間與語法版本
+        latest = {record["_id"]: record for record in batch}
+        operations = [
+            UpdateOne(
+                {"_id": record_id},
+                {
+                    "$max": {"timestamp": record["timestamp"]},
+                    "$set": {"syntax": record["syntax"]},
+                    "$setOnInsert": {k: v for k, v in record.items() if k not in ("_id", "timestamp", "syntax")},
+                },
+                upsert=True,
+            )
+            for record_id, record in latest.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        with self.lock:
+            for record_id, record in latest.items():
+                if self.pending.get(record_id) is record:
+                    del self.pending[record_id]
+
+    def flush(self):
+        """
+        等待所有排隊中的紀錄寫入資料庫。
+        """
+        self.writes.join()
+
+_history = None
+_history_lock = threading.Lock()
+
+def get_search_history():
+    """
+    取得整個程序共用的 SearchHistory，程序結束前會寫入尚未寫入的紀錄。
+    """
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = SearchHistory(connect_db()["104"]["search_history"])
+            atexit.register(_history.flush)
+        return _history
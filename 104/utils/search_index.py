@@ -0,0 +1,239 @@
+import re
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from .text_normalize import normalize_text, normalize_column, contains, memory_usage, iter_texts
+
+# 含有這些字元的搜尋詞會被 str.contains 當成正規表示式，無法用 n-gram 索引，直接掃描
+REGEX_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+# 內容很長的欄位 n-gram 數量太多，不建索引，搜尋時只對候選列做子字串比對
+SCAN_COLUMNS = ("detail", "other")
+# 出現在超過 1/32 列的 n-gram 才存成 bitset，此時 bitset 比 int32 列號陣列小
+DENSE_RATIO = 1 / 32
+
+def bits_to_mask(bits, size):
+    """
+    將以 int 表示的 bitset 轉成長度為 size 的布林陣列。
+    """
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8 or 1, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:size].astype(bool)
+
+def mask_to_bits(mask):
+    """
+    將布林陣列轉成以 int 表示的 bitset，第 i 個位元代表第 i 列。
+    """
+    return int.from_bytes(np.packbits(np.asarray(mask, dtype=bool), bitorder="little").tobytes(), "little")
+
+def ids_to_bits(ids, size):
+    mask = np.zeros(size, dtype=bool)
+    mask[ids] = True
+    return mask_to_bits(mask)
+
+def text_grams(text):
+    """
+    取得文字中所有單字元與相鄰兩字元的 n-gram。中文沒有空白斷詞，以字元 n-gram 建索引。
+    """
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+def term_grams(term):
+    """
+    搜尋詞需要全部出現的 n-gram：長度 1 用單字元，否則用所有相鄰兩字元。
+    """
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+def parse_term(term):
+    """
+    解析單一搜尋詞，回傳 (是否為 NOT, 欄位或 None, 搜尋詞)。
+    ! 開頭為 NOT，「欄位:搜尋詞」或「欄位：搜尋詞」指定欄位。
+    """
+    is_not = term.startswith('!')
+    if is_not:
+        term = term[1:].strip()
+
+    field = None
+    if re.search(r'[:：]', term):
+        field, term = [part.strip() for part in re.split(r'[:：]', term, 1)]
+    return is_not, field, term
+
+class SearchIndex:
+    """
+    grid_display 搜尋語法用的倒排索引。
+
+    每個欄位只在建立索引時正規化一次（全形轉半形、轉小寫，見 text_normalize），
+    並切成單字元與雙字元 n-gram。posting list 預設為排序過的 int32 列號陣列，
+    出現在很多列的 n-gram 才存成 int bitset；SCAN_COLUMNS 不建索引。
+    搜尋時先對搜尋詞的所有 n-gram 取交集得到候選列，長度大於 2 的搜尋詞再對候選列確認子字串。
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.columns = list(data.columns)
+        self.size = len(data)
+        self.all_bits = (1 << self.size) - 1
+        self.dense_min = max(1, int(self.size * DENSE_RATIO))
+        self.normalized = {}
+        self.postings = {}
+        # 依搜尋字串快取結果，Streamlit 的多個 session 執行緒共用，讀寫時需持有 query_lock
+        self.query_cache = {}
+        self.query_lock = threading.Lock()
+        for col in self.columns:
+            normalized = normalize_column(data[col])
+            self.normalized[col] = normalized
+            if col in SCAN_COLUMNS:
+                continue
+            if isinstance(normalized.dtype, pd.CategoricalDtype):
+                self.postings[col] = self._categorical_postings(normalized)
+            else:
+                self.postings[col] = self._text_postings(iter_texts(normalized))
+
+    def _compact(self, ids):
+        # 常見的 n-gram 存成 bitset，其餘保留 int32 列號陣列
+        if len(ids) >= self.dense_min:
+            return ids_to_bits(ids, self.size)
+        return ids
+
+    def _text_postings(self, texts):
+        row_ids = defaultdict(list)
+        for row, text in enumerate(texts):
+            for gram in text_grams(text):
+                row_ids[gram].append(row)
+        return {gram: self._compact(np.array(ids, dtype=np.int32)) for gram, ids in row_ids.items()}
+
+    def _categorical_postings(self, normalized):
+        # 每個不重複值只切一次 n-gram，再以 codes 對應回所有列
+        category_ids = defaultdict(list)
+        for code, text in enumerate(normalized.cat.categories):
+            for gram in text_grams(text):
+                category_ids[gram].append(code)
+        codes = normalized.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(codes[order], np.arange(len(normalized.cat.categories) + 1))
+        postings = {}
+        for gram, ids in category_ids.items():
+            rows = np.sort(np.concatenate([order[bounds[code]:bounds[code + 1]] for code in ids]))
+            postings[gram] = self._compact(rows)
+        return postings
+
+    def _posting_bits(self, col, gram):
+        posting = self.postings[col].get(gram)
+        if posting is None:
+            return 0
+        if isinstance(posting, int):
+            return posting
+        return ids_to_bits(posting, self.size)
+
+    def _iter_rows(self, bits):
+        return np.flatnonzero(bits_to_mask(bits, self.size))
+
+    def _contains(self, col, term, candidates, regex=False):
+        rows = self._iter_rows(candidates)
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = contains(self.normalized[col], term, rows, regex=regex)
+        return mask_to_bits(mask)
+
+    def match_column(self, col, term, within=None):
+        """
+        回傳 col 欄位中包含 term（已正規化）的列，within 為只需檢查的候選列 bitset。
+        """
+        within = self.all_bits if within is None else within
+        regex = bool(REGEX_CHARS.search(term))
+        if regex or col not in self.postings:
+            # 正規表示式與沒有索引的欄位只掃描候選列
+            return self._contains(col, term, within, regex=regex) if within else 0
+
+        candidates = within
+        for gram in term_grams(term):
+            candidates &= self._posting_bits(col, gram)
+            if not candidates:
+                return 0
+        if len(term) <= 2:
+            return candidates
+        return self._contains(col, term, candidates)
+
+    def match(self, field, term, within=None):
+        """
+        搜尋指定欄位，field 為 None 或不存在的欄位時搜尋所有欄位。
+        """
+        term = normalize_text(term)
+        within = self.all_bits if within is None else within
+        columns = [field] if field in self.normalized else self.columns
+        # 先查有索引的欄位，需要掃描的欄位只檢查還沒符合的列
+        matched = 0
+        for col in sorted(columns, key=lambda col: col not in self.postings):
+            matched |= self.match_column(col, term, within & ~matched)
+        return matched
+
+    def estimate(self, field, term):
+        """
+        以 n-gram posting list 的交集大小估計搜尋詞會符合的列數，不做子字串確認。
+        沒有索引的欄位無法估計，視為所有列都可能符合。
+        """
+        term = normalize_text(term)
+        columns = [field] if field in self.normalized else self.columns
+        if REGEX_CHARS.search(term) or any(col not in self.postings for col in columns):
+            return self.size
+        candidates = 0
+        for col in columns:
+            bits = self.all_bits
+            for gram in term_grams(term):
+                bits &= self._posting_bits(col, gram)
+                if not bits:
+                    break
+            candidates |= bits
+        return candidates.bit_count()
+
+    def to_mask(self, bits):
+        return bits_to_mask(bits, self.size)
+
+    def memory_report(self):
+        """
+        回傳正規化欄位的 dtype 與佔用位元組數，以及 posting list 的 n-gram 數與位元組數，方便確認搜尋用的資料大小。
+        """
+        usage = memory_usage(self.normalized)
+        report = {}
+        for col in self.columns:
+            postings = self.postings.get(col, {})
+            posting_bytes = sum(p.nbytes if isinstance(p, np.ndarray) else (p.bit_length() + 7) // 8
+                                for p in postings.values())
+            report[col] = {"dtype": str(self.normalized[col].dtype), "bytes": usage[col],
+                           "grams": len(postings), "posting_bytes": posting_bytes}
+        return report
+
+# 以 DataFrame 的 id 快取索引，並保留 DataFrame 的參照避免 id 被重複使用。
+# load_cached_frame 載入共用 DataFrame 時預先建立索引，並在資料版本更新時移除舊索引
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(data, max_entries=2):
+    """
+    取得 data 的搜尋索引，同一個 DataFrame 只建立一次。
+    """
+    key = id(data)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry.data is data:
+            return entry
+    # 建立索引時不持有鎖，其他 DataFrame 的查詢不需要等待
+    index = SearchIndex(data)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry.data is data:
+            return entry
+        _indexes[key] = index
+        while len(_indexes) > max_entries:
+            _indexes.pop(next(iter(_indexes)))
+        return index
+
+def discard_search_index(data):
+    """
+    移除 data 的搜尋索引，共用 DataFrame 被新版本取代時呼叫。
+    """
+    with _indexes_lock:
+        entry = _indexes.get(id(data))
+        if entry is not None and entry.data is data:
+            del _indexes[id(data)]
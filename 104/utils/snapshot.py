@@ -0,0 +1,102 @@
+import os
+import re
+import glob
+import datetime
+import importlib.util
+import pandas as pd
+
+# pyarrow 為 streamlit 的相依套件，沒有安裝時不產生 snapshot，app 直接讀 MongoDB
+if importlib.util.find_spec("pyarrow"):
+    import pyarrow as pa
+    import pyarrow.ipc
+else:
+    pa = None
+
+# 預設放在 104/.cache/snapshots，cron、worker 與 streamlit 不論工作目錄都讀寫同一個位置
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "snapshots")
+# 重複值多的欄位以 dictionary 編碼，每個不重複值只存一次
+DICTIONARY_COLUMNS = ("company", "industry", "address")
+# 保留最近幾個版本，app 讀取中的舊版本不會馬上被刪除
+KEEP_VERSIONS = 3
+
+def snapshot_path(name, generation):
+    return os.path.join(SNAPSHOT_DIR, f"{name}-{generation:06d}.arrow")
+
+def snapshot_versions(name):
+    """
+    回傳 {資料版本: 檔案路徑}。
+    """
+    versions = {}
+    for path in glob.glob(os.path.join(SNAPSHOT_DIR, f"{name}-*.arrow")):
+        match = re.fullmatch(rf"{re.escape(name)}-(\d+)\.arrow", os.path.basename(path))
+        if match:
+            versions[int(match.group(1))] = path
+    return versions
+
+def _to_table(data):
+    table = pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False)
+    for col in DICTIONARY_COLUMNS:
+        if col in table.column_names and not pa.types.is_dictionary(table.schema.field(col).type):
+            index = table.column_names.index(col)
+            table = table.set_column(index, col, table.column(col).dictionary_encode())
+    return table
+
+def write_snapshot(name, data, generation):
+    """
+    將 data（DataFrame 或文件 list）寫成 Arrow IPC 檔，檔名帶資料版本 generation。
+    先寫入暫存檔再改名，讀取端不會讀到寫到一半的檔案。回傳檔案路徑，沒有 pyarrow 時回傳 None。
+    """
+    if pa is None:
+        return None
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    table = _to_table(data)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"generation": str(generation).encode(),
+        b"created": datetime.datetime.now().isoformat().encode(),
+    })
+
+    path = snapshot_path(name, generation)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(temp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, path)
+
+    # 依寫入時間保留最近的版本，資料庫重建、版本號重新計算時也不會刪掉新檔
+    for old_path in sorted(snapshot_versions(name).values(), key=os.path.getmtime)[:-KEEP_VERSIONS]:
+        os.remove(old_path)
+    return path
+
+def read_snapshot(name, generation):
+    """
+    以 memory-map 讀取資料版本為 generation 的 snapshot，沒有該版本時回傳 None。
+    文字欄位直接使用 mmap 中的 Arrow 資料，dictionary 欄位轉成 categorical，不會複製成 Python 字串。
+    """
+    if pa is None:
+        return None
+    path = snapshot_versions(name).get(generation)
+    if path is None:
+        return None
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    string_dtype = pd.StringDtype("pyarrow")
+    return table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get)
+
+def export_snapshots(db, generation):
+    """
+    ingest 完成並更新資料版本後呼叫，將 app 使用的 jobs_view 與前五百大職缺寫成 snapshot。
+    """
+    from .jobs_view import find_jobs_view
+    from .top_500 import top_500
+    from .company_tags import DEFAULT_CSV
+    if pa is None:
+        print("沒有安裝 pyarrow，略過 snapshot")
+        return {}
+    paths = {
+        "jobs_view": write_snapshot("jobs_view", list(find_jobs_view(db)), generation),
+        "top_500": write_snapshot("top_500", top_500(DEFAULT_CSV, db=db), generation),
+    }
+    for name, path in paths.items():
+        print(f"已寫入 {name} snapshot：{path}")
+    return paths
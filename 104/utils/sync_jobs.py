@@ -0,0 +1,104 @@
+import json
+import hashlib
+import datetime
+import threading
+from pymongo import UpdateOne
+from .async_list_jobs import list_jobs_concurrently
+
+# 同步過程寫入的欄位，不列入內容雜湊
+META_FIELDS = ("_id", "_hash", "firstSeen", "lastSeen", "closed", "closedAt")
+# 會隨時間自然變動、但不代表職缺內容改變的欄位
+VOLATILE_FIELDS = ("applyCnt",)
+
+def job_hash(job):
+    """
+    計算職缺列表資料的內容雜湊，欄位順序不影響結果。
+    """
+    content = {k: v for k, v in job.items() if k not in META_FIELDS and k not in VOLATILE_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+def sync_timestamp():
+    """
+    取得同步用的時間點，截斷到毫秒以符合 MongoDB 的日期精度。
+    """
+    now = datetime.datetime.now()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def upsert_jobs(collection, jobs, now, chunk_size=1000):
+    """
+    將一批職缺與資料庫比對，只對新增或內容有變動的職缺做 upsert，
+    未變動的職缺只更新 lastSeen 與 VOLATILE_FIELDS。回傳 inserted、updated、unchanged 數量。
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for i in range(0, len(jobs), chunk_size):
+        chunk = jobs[i:i + chunk_size]
+        ids = [job["_id"] for job in chunk]
+        existing = {
+            doc["_id"]: doc
+            for doc in collection.find({"_id": {"$in": ids}}, {"_hash": 1, "closed": 1})
+        }
+
+        operations, unchanged = [], 0
+        for job in chunk:
+            content_hash = job_hash(job)
+            previous = existing.get(job["_id"])
+            if previous and previous.get("_hash") == content_hash and not previous.get("closed"):
+                # 內容沒變，但應徵人數等欄位仍要更新，避免資料庫中的值一直停在第一次寫入時
+                volatile = {k: job[k] for k in VOLATILE_FIELDS if k in job}
+                operations.append(UpdateOne({"_id": job["_id"]}, {"$set": {"lastSeen": now, **volatile}}))
+                unchanged += 1
+                continue
+
+            document = {k: v for k, v in job.items() if k not in META_FIELDS}
+            document.update({"_hash": content_hash, "lastSeen": now, "closed": False})
+            update = {"$set": document, "$min": {"firstSeen": now}}
+            if previous:
+                update["$unset"] = {"closedAt": ""}
+            operations.append(UpdateOne({"_id": job["_id"]}, update, upsert=True))
+            counts["updated" if previous else "inserted"] += 1
+
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        counts["unchanged"] += unchanged
+    return counts
+
+def close_missing_jobs(collection, now):
+    """
+    將本次同步（時間點 now）沒有再出現的職缺標記為已關閉。
+    """
+    result = collection.update_many(
+        {"lastSeen": {"$not": {"$gte": now}}, "closed": {"$ne": True}},
+        {"$set": {"closed": True, "closedAt": now}}
+    )
+    return result.modified_count
+
+def sync_jobs(collection, jobs, now=None):
+    """
+    以增量方式同步 jobs 集合，取代 delete_many + insert_many。
+    保留每筆職缺的 firstSeen、lastSeen，消失的職缺標記 closed 與 closedAt。
+    """
+    now = now or sync_timestamp()
+    counts = upsert_jobs(collection, jobs, now)
+    counts["closed"] = close_missing_jobs(collection, now)
+    return counts
+
+def sync_jobs_resumable(collection, areas, checkpoint, resume=True, **crawler_kwargs):
+    """
+    邊爬邊同步：每個分頁爬完就立即寫入 jobs 集合，並將進度記錄在 checkpoint。
+    中斷後再次執行會接續未完成的區域與分頁，全部完成後才關閉本次沒出現的職缺。
+    """
+    now = checkpoint.start(resume=resume)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    counts_lock = threading.Lock()
+
+    def on_page(area_id, page, jobs):
+        page_counts = upsert_jobs(collection, jobs, now)
+        with counts_lock:
+            for key, value in page_counts.items():
+                counts[key] += value
+
+    list_jobs_concurrently(areas, on_page=on_page, checkpoint=checkpoint, **crawler_kwargs)
+    counts["closed"] = close_missing_jobs(collection, now)
+    checkpoint.finish()
+    return counts
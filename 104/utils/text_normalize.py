@@ -0,0 +1,52 @@
+import unicodedata
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# 有安裝 pyarrow 時文字欄位以 Arrow 字串儲存，比 Python 物件欄位省記憶體
+ARROW_STRING = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else None
+
+def normalize_text(text):
+    """
+    搜尋用的文字正規化：全形轉半形（NFKC）並轉成小寫。
+    """
+    return unicodedata.normalize("NFKC", text).lower()
+
+def normalize_column(series, categorical_ratio=0.5):
+    """
+    將欄位轉成正規化後的精簡表示，與 astype(str) 一樣把 None / NaN 轉成文字。
+    不重複值比例低於 categorical_ratio 的欄位用 categorical，其餘用 Arrow 字串。
+    """
+    normalized = series.astype(str).str.normalize("NFKC").str.lower()
+    if len(normalized) and normalized.nunique() / len(normalized) < categorical_ratio:
+        return normalized.astype("category")
+    if ARROW_STRING:
+        return normalized.astype(ARROW_STRING)
+    return normalized
+
+def contains(normalized, term, rows, regex=False):
+    """
+    回傳 normalized 欄位第 rows 列是否包含 term 的布林陣列。
+    categorical 欄位只比對每個不重複值一次。
+    """
+    if isinstance(normalized.dtype, pd.CategoricalDtype):
+        categories = normalized.cat.categories.to_series()
+        matched = categories.str.contains(term, regex=regex, na=False).to_numpy()
+        codes = normalized.cat.codes.to_numpy()[rows]
+        return matched[codes]
+    return normalized.iloc[rows].str.contains(term, regex=regex, na=False).to_numpy(dtype=bool)
+
+def memory_usage(columns):
+    """
+    回傳 {欄位: 佔用位元組數}。
+    """
+    return {col: int(series.memory_usage(deep=True)) for col, series in columns.items()}
+
+def iter_texts(normalized):
+    """
+    逐列取得正規化後的 Python 字串，只在建立索引時使用。
+    """
+    if isinstance(normalized.dtype, pd.CategoricalDtype):
+        categories = np.asarray(normalized.cat.categories, dtype=object)
+        return categories[normalized.cat.codes.to_numpy()]
+    return normalized.tolist()
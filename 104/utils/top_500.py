@@ -1,46 +1,51 @@
-import csv
-from .connect_db import connect_db, jobs_detail_project, jobs_condition
-
-def top_500(csv_filename="104/taiwan_500.csv"):
-    
-    # 讀取 CSV 檔案，這次以「公司名稱」作為 key
-    top_companies = {}
-    with open(csv_filename, mode='r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # 注意去除可能多餘的空白
-            company_name = row['公司名稱'].strip()
-            top_companies[company_name] = row
-
-    # 取得 CSV 中所有的公司名稱
-    company_names = list(top_companies.keys())
-
-    # 連線資料庫，選擇使用的資料庫與集合
-    client = connect_db()
-    db = client["104"]
+from .connect_db import connect_db
+from .jobs_view import jobs_view_pipeline, find_jobs_view
+from .company_matcher import get_company_matcher
+from .company_tags import TAG_FIELD, TAGGED_QUERY
+
+def tagged_jobs_pipeline():
+    """
+    只讀取 ingest 時已標記為前五百大企業的職缺，投影與篩選條件與 jobs_view 相同，另外加上 rank。
+    """
+    pipeline = [{'$match': TAGGED_QUERY}] + jobs_view_pipeline()
+    pipeline[1]['$project']['rank'] = f'${TAG_FIELD}.rank'
+    return pipeline + [{'$project': {'_id': 0}}, {'$sort': {'company': -1}}]
+
+def top_500(csv_filename="104/taiwan_500.csv", db=None):
+
+    # 以 CSV 的「公司名稱」建立比對器（已移除 股份有限公司 等字尾並統一全形、臺/台）
+    matcher = get_company_matcher(csv_filename)
+
+    # 連線資料庫，選擇使用的資料庫
+    if db is None:
+        db = connect_db()["104"]
     collection = db["jobs_detail"]
 
-    # mongodb pipeline
-    project = jobs_detail_project() # 顯示 jobs_detail 中所需欄位
-    condition = jobs_condition()
-    sort = { '$sort': {'company': -1} }
-    pipeline = [project, condition, sort]
-
-    # record-by-record 交叉比對的方式
-    matched_jobs = []
-    for doc in collection.aggregate(pipeline, allowDiskUse=True):
-        cust_name = doc["company"]
-        # 檢查是否有任一個註冊名稱存在於 cust_name 中
-        if any(registered_name in cust_name for registered_name in company_names):
-            matched_jobs.append(doc)
-
-    cust_name_set =  set(doc["company"] for doc in matched_jobs)
-    missing = len(set(company_names)) - len(cust_name_set)
+    if collection.find_one(TAGGED_QUERY, {'_id': 1}) is not None:
+        # 以索引讀取 ingest 時已標記的職缺
+        matched_jobs = list(collection.aggregate(tagged_jobs_pipeline()))
+    else:
+        # 尚未標記過（舊資料），逐筆比對 jobs_view 中的公司名稱
+        print("jobs_detail 尚未標記前五百大企業，請執行 backfill_top_500.py，這次改為逐筆比對")
+        matched_jobs = []
+        company_rows = {}
+        for doc in find_jobs_view(db):
+            cust_name = doc["company"]
+            if cust_name not in company_rows:
+                company_rows[cust_name] = matcher.match(cust_name)
+            row = company_rows[cust_name]
+            if row is not None:
+                # 將 CSV 中的排名併入職缺資料
+                doc["rank"] = row["rank"]
+                matched_jobs.append(doc)
+
+    matched_ranks = set(doc["rank"] for doc in matched_jobs)
+    missing = len(matcher.rows) - len(matched_ranks)
 
     print(f"已找到 {len(matched_jobs)} 筆符合條件且位於前五百大企業的職缺資料")
-    print(f"全台前五百大企業中有 {len(cust_name_set)} 間公司開放職缺於 104 當中")
+    print(f"全台前五百大企業中有 {len(matched_ranks)} 間公司開放職缺於 104 當中")
     print(f"全台前五百大企業中有 {missing} 間公司未在 104 中開放職缺")
     return matched_jobs
 
 if __name__ == '__main__':
-    top_500()
\ No newline at end of file
+    top_500()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 程式以 python 104/xxx.py 執行、以 from utils import ... 匯入，測試時同樣將 104 加入路徑
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "104"))
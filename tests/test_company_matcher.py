@@ -0,0 +1,37 @@
+import os
+import pytest
+from utils.company_matcher import CompanyMatcher, normalize_company
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "104", "taiwan_500.csv")
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CompanyMatcher.from_csv(CSV)
+
+def test_normalize_company():
+    assert normalize_company("臺灣 電力股份有限公司") == "台灣電力"
+    assert normalize_company("ＡＢＣ有限公司") == "abc"
+
+@pytest.mark.parametrize("name, expected", [
+    ("台灣積體電路製造股份有限公司", "台灣積體電路製造股份有限公司"),
+    ("台灣積體電路製造股份有限公司_台積電", "台灣積體電路製造股份有限公司"),
+    ("臺灣電力股份有限公司", "台灣電力股份有限公司"),
+    ("大同股份有限公司", "大同股份有限公司"),
+    ("大同", "大同股份有限公司"),
+])
+def test_match_registered_names(matcher, name, expected):
+    assert matcher.match(name)["公司名稱"] == expected
+
+@pytest.mark.parametrize("name", [
+    "大同大學",
+    "台北市私立大同高級中學",
+    "高品質生活有限公司",
+    "中環科技事業股份有限公司",
+    "",
+])
+def test_short_names_need_a_suffix(matcher, name):
+    assert matcher.match(name) is None
+
+def test_every_csv_name_matches_itself(matcher):
+    for row in matcher.rows:
+        assert matcher.match(row["公司名稱"])["rank"] == row["rank"]
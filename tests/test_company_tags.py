@@ -0,0 +1,25 @@
+import pytest
+from utils.company_tags import TAG_FIELD, tag_job_detail, backfill_company_tags
+
+mongomock = pytest.importorskip("mongomock")
+
+def detail(url, company):
+    return {"_id": url, "header": {"custName": company, "jobName": "工程師"}}
+
+def test_tag_job_detail():
+    tagged = tag_job_detail(detail("a", "大同股份有限公司"))
+    assert tagged[TAG_FIELD]["name"] == "大同股份有限公司"
+    assert TAG_FIELD not in tag_job_detail(detail("b", "大同大學"))
+
+def test_backfill_removes_false_positive_tags():
+    collection = mongomock.MongoClient()["104"]["jobs_detail"]
+    stale = {"key": "大同", "rank": 134, "name": "大同股份有限公司"}
+    collection.insert_many([
+        {**detail("a", "大同大學"), TAG_FIELD: stale},
+        detail("b", "台灣積體電路製造股份有限公司"),
+        {**detail("c", "大同股份有限公司"), TAG_FIELD: stale},
+    ])
+    assert backfill_company_tags(collection) == {"scanned": 3, "tagged": 2, "changed": 2}
+    assert TAG_FIELD not in collection.find_one({"_id": "a"})
+    assert collection.find_one({"_id": "b"})[TAG_FIELD]["rank"] == 3
+    assert backfill_company_tags(collection)["changed"] == 0
@@ -0,0 +1,83 @@
+import datetime
+import pytest
+from utils import async_list_jobs
+from utils.checkpoint import CrawlCheckpoint
+from utils.sync_jobs import sync_jobs, sync_jobs_resumable
+
+mongomock = pytest.importorskip("mongomock")
+
+# 每個區域的總頁數，每頁一筆職缺，職缺 ID 為「區域-頁碼」
+AREAS = {"A": "甲", "B": "乙"}
+LAST_PAGES = {"A": 3, "B": 3}
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+class FakeClient:
+    """
+    依 area、page 回傳假的列表 API 資料，fail 中的分頁會丟出例外，並記錄每次請求。
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requests = []
+
+    def get(self, url, params=None, **kwargs):
+        page = (params["area"], params["page"])
+        self.requests.append(page)
+        if page in self.fail:
+            raise ConnectionError("連線中斷")
+        job_id = f"{page[0]}-{page[1]}"
+        return FakeResponse({
+            "data": [{"link": {"job": job_id}, "jobName": job_id}],
+            "metadata": {"pagination": {"total": LAST_PAGES[page[0]], "currentPage": page[1], "lastPage": LAST_PAGES[page[0]]}},
+        })
+
+class FakeLimiter:
+    def on_success(self):
+        pass
+
+    def on_throttle(self, retry_after=None):
+        pass
+
+def crawl(db, monkeypatch, client):
+    monkeypatch.setattr(async_list_jobs, "get_http_client", lambda **kwargs: client)
+    checkpoint = CrawlCheckpoint(db["crawl_state"], "fetch_jobs")
+    return sync_jobs_resumable(db["jobs"], AREAS, checkpoint, max_retries=1, limiter=FakeLimiter())
+
+def done_pages(db):
+    state = db["crawl_state"].find_one({"_id": "fetch_jobs"})
+    return {(area, page) for area, area_state in state["areas"].items() for page in area_state.get("pages", [])}
+
+def test_resume_fetches_remaining_pages_and_closes_only_after_finish(monkeypatch):
+    db = mongomock.MongoClient()["104"]
+    previous = datetime.datetime.now() - datetime.timedelta(days=1)
+    sync_jobs(db["jobs"], [{"_id": "gone", "link": {"job": "gone"}}, {"_id": "B-2", "link": {"job": "B-2"}}], now=previous)
+    all_pages = {(area, page) for area, last_page in LAST_PAGES.items() for page in range(1, last_page + 1)}
+
+    # 第一次在乙區第 2 頁中斷：已爬到的分頁寫入資料庫，但還不能關閉任何職缺
+    with pytest.raises(RuntimeError):
+        crawl(db, monkeypatch, FakeClient(fail={("B", 2)}))
+    finished = done_pages(db)
+    assert ("B", 2) not in finished
+    assert db["jobs"].count_documents({"closed": True}) == 0
+    # checkpoint 記錄完成的分頁一定已寫入；寫入後、記錄前被中斷的分頁接續時會重爬
+    written = {doc["_id"] for doc in db["jobs"].find({"lastSeen": {"$gt": previous}})}
+    assert {f"{area}-{page}" for area, page in finished} <= written
+
+    # 接續執行只爬尚未完成的分頁，全部完成後才關閉本次沒出現的職缺
+    client = FakeClient()
+    counts = crawl(db, monkeypatch, client)
+    assert set(client.requests) == all_pages - finished
+    assert len(client.requests) == len(all_pages - finished)
+    assert counts["closed"] == 1
+    assert db["jobs"].find_one({"_id": "gone"})["closed"] is True
+    assert db["jobs"].count_documents({"closed": False}) == len(all_pages)
+    assert db["crawl_state"].find_one({"_id": "fetch_jobs"})["status"] == "done"
@@ -0,0 +1,61 @@
+import json
+from utils import detail_pipeline
+from utils.detail_ingest import parse_detail, decompress_raw
+from utils.get_jobs import FetchError
+from utils.http_cache import ResponseCache, cache_key
+from utils.http_client import HttpClient
+
+PAYLOAD = {"data": {
+    "header": {"jobName": "資料工程師", "custName": "測試股份有限公司", "appearDate": "2025/01/01"},
+    "jobDetail": {"salary": "月薪40,000元", "salaryType": "50"},
+    "condition": {"specialty": [{"code": "1", "description": "Python"}]},
+    "welfare": {"welfare": "很長的福利說明"},
+}}
+
+def test_parse_detail_keeps_schema_fields_only():
+    result = parse_detail("u", json.dumps(PAYLOAD).encode())
+    assert result.ok
+    assert result.document["header"] == {"jobName": "資料工程師", "custName": "測試股份有限公司"}
+    assert result.document["jobDetail"]["salaryType"] == 50
+    assert result.document["condition"]["specialty"] == [{"description": "Python"}]
+    assert "welfare" not in result.document
+
+def test_parse_detail_errors():
+    assert parse_detail("u", b"{bad").error.reason == "invalid_json"
+    assert parse_detail("u", b'{"error": "busy"}').error.reason == "missing_data"
+    assert parse_detail("u", b'{"data": {"header": {}}}').error.reason == "missing_field"
+    error = FetchError("u", "http_error", "HTTP 404", 404)
+    assert parse_detail("u", error).error is error
+
+def test_keep_raw():
+    raw = json.dumps(PAYLOAD).encode()
+    assert decompress_raw(parse_detail("u", raw, keep_raw=True).document) == raw
+    assert "_raw" not in parse_detail("u", raw, keep_raw=False).document
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.content = body
+
+def test_fetch_detail_parses_once_and_caches_valid_payloads(tmp_path, monkeypatch):
+    client = HttpClient(http2=False, cache=ResponseCache(path=str(tmp_path / "cache.sqlite")))
+    bodies = {"a": json.dumps(PAYLOAD).encode(), "b": b'{"data": {}}'}
+    parsed = []
+
+    def counting_parse(url, payload, keep_raw=None):
+        parsed.append(url)
+        return parse_detail(url, payload, keep_raw)
+
+    monkeypatch.setattr(detail_pipeline, "get_http_client", lambda: client)
+    monkeypatch.setattr(detail_pipeline, "parse_detail", counting_parse)
+    monkeypatch.setattr(detail_pipeline, "fetch_response",
+                        lambda url, cacheable=None, refresh=False: FakeResponse(bodies[url[-1]]))
+
+    ajax_a, ajax_b = "https://www.104.com.tw/job/ajax/content/a", "https://www.104.com.tw/job/ajax/content/b"
+    assert detail_pipeline.fetch_detail(ajax_a).ok
+    assert not detail_pipeline.fetch_detail(ajax_b).ok
+    assert len(parsed) == 2
+    assert client.cache.get(cache_key(ajax_a))[0] is not None
+    assert client.cache.get(cache_key(ajax_b))[0] is None
@@ -0,0 +1,43 @@
+import datetime
+import pytest
+from utils.detail_sync import merge_join, find_stale_jobs, reconcile_closed_details
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()["104"]
+    now = datetime.datetime.now()
+    db["jobs"].insert_many([
+        {"_id": "a", "_hash": "ha", "jobName": "A"},
+        {"_id": "b", "_hash": "hb2", "jobName": "B"},
+        {"_id": "c", "_hash": "hc", "jobName": "C"},
+        {"_id": "d", "_hash": "hd", "jobName": "D", "closed": True},
+        {"_id": "e", "_hash": "he", "jobName": "E"},
+    ])
+    db["jobs_detail"].insert_many([
+        {"_id": "a", "_listingHash": "ha", "_fetchedAt": now},
+        {"_id": "b", "_listingHash": "hb1", "_fetchedAt": now},
+        {"_id": "c", "_listingHash": "hc", "_fetchedAt": now - datetime.timedelta(days=10)},
+        {"_id": "d", "_listingHash": "hd", "_fetchedAt": now},
+        {"_id": "z", "_listingHash": "hz", "_fetchedAt": now},
+    ])
+    return db
+
+def test_merge_join_pairs_sorted_ids():
+    left = [{"_id": 1}, {"_id": 2}, {"_id": 4}]
+    right = [{"_id": 2}, {"_id": 3}, {"_id": 4}, {"_id": 5}]
+    pairs = [(key, l is not None, r is not None) for key, l, r in merge_join(left, right)]
+    assert pairs == [(1, True, False), (2, True, True), (3, False, True), (4, True, True), (5, False, True)]
+
+def test_unchanged_hash_is_skipped_and_changed_hash_refetched(db):
+    # a 指紋相同略過；b 列表指紋改變、e 尚未爬取；d 已關閉不爬
+    assert find_stale_jobs(db["jobs"], db["jobs_detail"]) == {"b": "hb2", "e": "he"}
+
+def test_ttl_expiry_refetches_old_details(db):
+    stale = find_stale_jobs(db["jobs"], db["jobs_detail"], ttl_days=7)
+    assert stale == {"b": "hb2", "c": "hc", "e": "he"}
+
+def test_reconcile_deletes_closed_and_missing(db):
+    assert reconcile_closed_details(db["jobs"], db["jobs_detail"], batch_size=1) == 2
+    assert sorted(doc["_id"] for doc in db["jobs_detail"].find()) == ["a", "b", "c"]
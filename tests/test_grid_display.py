@@ -0,0 +1,26 @@
+import pandas as pd
+from utils.grid_display import paginate, sort_frame
+
+def frame():
+    return pd.DataFrame({
+        "job": ["a", "b", "c", "d", "e"],
+        "annualSalary": [500.0, None, 900.0, 100.0, 700.0],
+        "company": pd.Categorical(["乙", "甲", "丙", "甲", "乙"]),
+    })
+
+def test_sort_before_paginate_orders_the_whole_result():
+    data = sort_frame(frame(), "annualSalary", descending=True)
+    first, page_count = paginate(data, 1, 2)
+    second, _ = paginate(data, 2, 2)
+    assert page_count == 3
+    assert first["job"].tolist() == ["c", "e"]
+    assert second["job"].tolist() == ["a", "d"]
+    assert data["job"].iloc[-1] == "b"
+
+def test_sort_frame_ascending_and_categorical():
+    assert sort_frame(frame(), "annualSalary")["job"].tolist() == ["d", "a", "e", "c", "b"]
+    assert sort_frame(frame(), "company")["company"].tolist() == sorted(frame()["company"])
+
+def test_sort_frame_without_column_keeps_order():
+    assert sort_frame(frame(), None)["job"].tolist() == list("abcde")
+    assert sort_frame(frame(), "missing")["job"].tolist() == list("abcde")
@@ -0,0 +1,93 @@
+import json
+from utils.http_cache import ResponseCache
+from utils.http_client import HttpClient
+
+class FakeResponse:
+    def __init__(self, url, body, status_code=200):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {}
+        self.content = json.dumps(body).encode("utf-8")
+        self.raw = None
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+class FakeSession:
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        return FakeResponse(url, self.bodies[min(self.calls, len(self.bodies)) - 1])
+
+    def close(self):
+        pass
+
+def make_client(tmp_path, *bodies):
+    client = HttpClient(http2=False, cache=ResponseCache(path=str(tmp_path / "cache.sqlite")))
+    client._client = FakeSession(*bodies)
+    return client
+
+def test_error_payload_is_not_cached(tmp_path):
+    client = make_client(tmp_path, {"error": "busy"})
+    for _ in range(5):
+        assert "error" in client.get("https://example.com/api").json()
+    assert client._client.calls == 5
+
+def test_valid_payload_is_cached(tmp_path):
+    client = make_client(tmp_path, {"data": [1]})
+    for _ in range(3):
+        assert client.get("https://example.com/api").json() == {"data": [1]}
+    assert client._client.calls == 1
+
+def test_refresh_bypasses_cache(tmp_path):
+    client = make_client(tmp_path, {"data": [1]}, {"data": [2]})
+    client.get("https://example.com/api")
+    assert client.get("https://example.com/api", refresh=True).json() == {"data": [2]}
+    assert client.get("https://example.com/api").json() == {"data": [2]}
+    assert client._client.calls == 2
+
+def test_cached_payload_rejected_by_cacheable_is_refetched(tmp_path):
+    client = make_client(tmp_path, {"data": {}}, {"data": {"ok": True}})
+    client.get("https://example.com/api", cacheable=lambda r: True)
+    response = client.get("https://example.com/api", cacheable=lambda r: bool(r.json()["data"]))
+    assert response.json() == {"data": {"ok": True}}
+    assert client._client.calls == 2
+
+def test_get_http_client_resizes_in_place(monkeypatch):
+    from utils import http_client
+    monkeypatch.setattr(http_client, "_client", None)
+    monkeypatch.setenv("HTTP_POOL_SIZE", "4")
+    monkeypatch.setenv("HTTP2", "off")
+    monkeypatch.setattr(http_client, "_cache", (None, "off"))
+
+    client = http_client.get_http_client()
+    old_session = client._client
+    closed = []
+    monkeypatch.setattr(old_session, "close", lambda: closed.append(True))
+
+    assert http_client.get_http_client(pool_size=16) is client
+    assert client.pool_size == 16
+    assert client._client is not old_session
+    assert closed == [True]
+    assert http_client.get_http_client(pool_size=8) is client
+    assert client.pool_size == 16
+
+def test_cache_is_off_by_default(monkeypatch):
+    from utils.http_cache import cache_from_env
+    monkeypatch.delenv("HTTP_CACHE", raising=False)
+    assert cache_from_env() == (None, "off")
+
+def test_fetch_content_refresh_skips_fresh_cache(tmp_path, monkeypatch):
+    from utils import get_jobs
+    client = make_client(tmp_path, {"data": {"v": 1}}, {"data": {"v": 2}})
+    monkeypatch.setattr(get_jobs, "get_http_client", lambda: client)
+    assert json.loads(get_jobs.fetch_content("https://example.com/job")) == {"data": {"v": 1}}
+    assert json.loads(get_jobs.fetch_content("https://example.com/job", refresh=True)) == {"data": {"v": 2}}
+    assert client._client.calls == 2
@@ -0,0 +1,121 @@
+import json
+import datetime
+import pytest
+from utils.job_queue import DetailQueue
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def queue():
+    queue = DetailQueue(mongomock.MongoClient()["104"]["detail_queue"], lease_seconds=300, max_attempts=2)
+    queue.enqueue({"a": "fa"})
+    return queue
+
+def expire_lease(queue, url):
+    past = datetime.datetime.now() - datetime.timedelta(seconds=1)
+    queue.collection.update_one({"_id": url}, {"$set": {"leaseUntil": past}})
+
+def test_enqueue_skips_existing(queue):
+    assert queue.enqueue({"a": "fa", "b": "fb"}) == 1
+    assert queue.active_count() == 2
+
+def test_claim_leases_item_once(queue):
+    item = queue.claim("w1")
+    assert item["_id"] == "a"
+    assert item["state"] == "leased"
+    assert item["worker"] == "w1"
+    assert item["attempts"] == 1
+    assert queue.claim("w2") is None
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.claim("w1")
+    expire_lease(queue, "a")
+    item = queue.claim("w2")
+    assert item["worker"] == "w2"
+    assert item["attempts"] == 2
+
+def test_heartbeat_extends_only_own_leases(queue):
+    queue.claim("w1")
+    expire_lease(queue, "a")
+    queue.heartbeat("w2")
+    assert queue.collection.find_one({"_id": "a"})["leaseUntil"] < datetime.datetime.now()
+    queue.heartbeat("w1")
+    assert queue.collection.find_one({"_id": "a"})["leaseUntil"] > datetime.datetime.now()
+    assert queue.claim("w2") is None
+
+def test_fail_returns_to_pending_until_max_attempts(queue):
+    queue.claim("w1")
+    queue.fail("a", "HTTP 500", "w1")
+    item = queue.collection.find_one({"_id": "a"})
+    assert item["state"] == "pending"
+    assert item["error"] == "HTTP 500"
+    assert "worker" not in item
+
+    queue.claim("w1")
+    queue.fail("a", "HTTP 500", "w1")
+    assert queue.collection.find_one({"_id": "a"})["state"] == "failed"
+    assert queue.claim("w1") is None
+
+def test_fail_from_stale_worker_is_ignored(queue):
+    queue.claim("w1")
+    expire_lease(queue, "a")
+    queue.claim("w2")
+    queue.fail("a", "timeout", "w1")
+    item = queue.collection.find_one({"_id": "a"})
+    assert item["state"] == "leased"
+    assert item["worker"] == "w2"
+
+def test_complete_only_own_items(queue):
+    queue.claim("w1")
+    queue.complete(["a"], "w2")
+    assert queue.collection.find_one({"_id": "a"})["state"] == "leased"
+    queue.complete(["a"], "w1")
+    assert queue.collection.find_one({"_id": "a"})["state"] == "done"
+    assert queue.active_count() == 0
+
+def test_release_expired_after_max_attempts(queue):
+    queue.claim("w1")
+    expire_lease(queue, "a")
+    queue.claim("w2")
+    expire_lease(queue, "a")
+    assert queue.claim("w3") is None
+    queue.release_expired()
+    assert queue.collection.find_one({"_id": "a"})["state"] == "failed"
+
+def test_worker_retries_failed_items_in_the_same_run(monkeypatch):
+    from utils import detail_pipeline
+    from utils.job_queue import run_queue_worker
+    from utils.get_jobs import FetchError
+
+    db = mongomock.MongoClient()["104"]
+    queue = DetailQueue(db["detail_queue"], max_attempts=3)
+    queue.enqueue({"https://www.104.com.tw/job/a": "fa", "https://www.104.com.tw/job/b": "fb"})
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+        content = json.dumps({"data": {"header": {"jobName": "工程師", "custName": "測試股份有限公司"}}}).encode()
+
+    def fake_fetch(url, cacheable=None, refresh=False):
+        calls.append(url)
+        if url.endswith("/b") and calls.count(url) == 1:
+            return FetchError(url, "network_error", "timeout")
+        return FakeResponse()
+
+    monkeypatch.setattr(detail_pipeline, "fetch_response", fake_fetch)
+    stats = run_queue_worker(queue, db["jobs_detail"], worker_id="w1", max_workers=2, poll_seconds=0.01)
+
+    assert stats["written"] == 2
+    assert queue.active_count() == 0
+    assert db["detail_queue"].find_one({"_id": "https://www.104.com.tw/job/b"})["attempts"] == 2
+    assert db["jobs_detail"].count_documents({}) == 2
+
+def test_worker_stops_on_exhausted_expired_leases(queue):
+    from utils.job_queue import run_queue_worker
+    queue.claim("w1")
+    expire_lease(queue, "a")
+    queue.claim("w2")
+    expire_lease(queue, "a")
+    stats = run_queue_worker(queue, queue.collection.database["jobs_detail"], worker_id="w3", poll_seconds=0.01)
+    assert stats["fetched"] == 0
+    assert queue.collection.find_one({"_id": "a"})["state"] == "failed"
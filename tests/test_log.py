@@ -0,0 +1,23 @@
+import io
+import sys
+import json
+import logging
+from utils.log import get_logger, log_event
+
+def test_log_event_writes_one_json_object_per_line(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    logger = get_logger("test.log_event")
+    logger.setLevel(logging.INFO)
+
+    log_event(logger, logging.INFO, "batch_written", size=3, company="台積電")
+    log_event(logger, logging.DEBUG, "detail_saved", url="https://www.104.com.tw/job/a")
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["level"] == "INFO"
+    assert record["event"] == "batch_written"
+    assert record["size"] == 3
+    assert record["company"] == "台積電"
+    assert "time" in record
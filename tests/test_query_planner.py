@@ -0,0 +1,23 @@
+import pytest
+from utils.query_planner import compile_query, upgrade_legacy_query, QuerySyntaxError
+
+def test_and_binds_tighter_than_or():
+    assert compile_query("a | b & !c") == (
+        "or", ("term", None, "a"), ("and", ("term", None, "b"), ("not", ("term", None, "c"))))
+
+def test_comma_separated_terms_are_and():
+    assert compile_query("job:ai，台北") == ("and", ("term", "job", "ai"), ("term", None, "台北"))
+
+def test_unbalanced_parentheses():
+    with pytest.raises(QuerySyntaxError):
+        compile_query("(a | b")
+
+@pytest.mark.parametrize("legacy, upgraded", [
+    ("a | b & c & !d", "(a | b) & c & !d"),
+    ("job:x | job:y & address:台北", "(job:x | job:y) & address:台北"),
+    ("a & b", "a & b"),
+    ("a | b", "a | b"),
+    ("a, b", "a, b"),
+])
+def test_upgrade_legacy_query(legacy, upgraded):
+    assert upgrade_legacy_query(legacy) == upgraded
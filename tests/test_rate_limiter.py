@@ -0,0 +1,65 @@
+import pytest
+from utils.rate_limiter import RateLimiter, parse_retry_after, DEFAULT_RETRY_AFTER
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def make_limiter(clock, **kwargs):
+    options = {"rate": 2.0, "burst": 2, "jitter": 0, "clock": clock, "sleep": clock.sleep}
+    return RateLimiter(**{**options, **kwargs})
+
+def test_burst_then_wait_for_refill():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.slept == []
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+def test_tokens_refill_up_to_burst():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.acquire()
+    limiter.acquire()
+    clock.now += 10
+    for _ in range(2):
+        limiter.acquire()
+    assert clock.slept == []
+
+def test_aimd_rate_changes():
+    limiter = make_limiter(FakeClock(), rate=4.0, increase=0.5, decrease=0.5, min_rate=1.0, max_rate=5.0)
+    limiter.on_success()
+    assert limiter.rate == 4.5
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == 5.0
+    for _ in range(5):
+        limiter.on_throttle()
+    assert limiter.rate == 1.0
+    assert limiter.metrics()["throttled"] == 5
+
+def test_retry_after_blocks_tokens():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.on_throttle(retry_after=30)
+    limiter.acquire()
+    assert clock.slept == [pytest.approx(30)]
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(None) == DEFAULT_RETRY_AFTER
+    assert parse_retry_after("soon") == DEFAULT_RETRY_AFTER
+    assert parse_retry_after(None, default=None) is None
+    # Wed, 01 Jan 2025 00:01:00 GMT 為 1735689660
+    assert parse_retry_after("Wed, 01 Jan 2025 00:01:00 GMT", now=1735689600) == pytest.approx(60)
@@ -0,0 +1,31 @@
+import pytest
+from utils.salary import parse_salary, parse_salaries
+
+# (薪資文字, salaryType, unit, negotiable, min, max, annual)，年薪以預設每天 8 小時、每年 250 天、12 個月換算
+CASES = [
+    ("月薪40,000~60,000元", 50, "monthly", False, 40000, 60000, 600000),
+    ("月薪35,000元以上", 50, "monthly", False, 35000, None, 420000),
+    ("待遇面議（經常性薪資達4萬元以上）", 10, "monthly", True, 40000, None, 480000),
+    ("待遇面議（經常性薪資達 4 萬元以上）", 10, "monthly", True, 40000, None, 480000),
+    ("待遇面議", 10, "negotiable", True, None, None, 0),
+    ("時薪190~250元", 50, "hourly", False, 190, 250, 440000),
+    ("日薪1,500元", 50, "daily", False, 1500, 1500, 375000),
+    ("年薪100萬~150萬元", 60, "yearly", False, 1000000, 1500000, 1250000),
+    ("論件計酬", 50, "piece", False, None, None, None),
+    ("40,000~50,000元", 50, "monthly", False, 40000, 50000, 540000),
+    ("40000元-50000元", 50, "monthly", False, 40000, 50000, 540000),
+    (None, None, None, False, None, None, None),
+]
+
+@pytest.mark.parametrize("salary, salary_type, unit, negotiable, low, high, annual", CASES)
+def test_parse_salary(salary, salary_type, unit, negotiable, low, high, annual):
+    parsed = parse_salary(salary, salary_type)
+    assert parsed["unit"] == unit
+    assert parsed["negotiable"] is negotiable # 要能直接寫入 MongoDB，不能是 numpy.bool_
+    assert parsed["min"] == low
+    assert parsed["max"] == high
+    assert parsed["annual"] == annual
+
+def test_parse_salaries_matches_single_rows():
+    batch = parse_salaries([case[0] for case in CASES], [case[1] for case in CASES])
+    assert batch == [parse_salary(case[0], case[1]) for case in CASES]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.search_index import SearchIndex
+from utils.text_normalize import normalize_text
+from utils.query_planner import query_bits
+
+@pytest.fixture
+def data():
+    rows = 200
+    return pd.DataFrame({
+        "job": [("Python 工程師" if i % 3 == 0 else "資料分析師") + str(i) for i in range(rows)],
+        "company": [f"公司{i % 7}" for i in range(rows)],
+        "detail": ["負責機器學習模型" if i % 5 == 0 else "維護ＡＰＩ服務" for i in range(rows)],
+    })
+
+def brute_force(data, columns, term):
+    term = normalize_text(term)
+    return {row for col in columns for row in range(len(data)) if term in normalize_text(str(data[col].iloc[row]))}
+
+def rows(index, bits):
+    return set(np.flatnonzero(index.to_mask(bits)))
+
+@pytest.mark.parametrize("term", ["python", "工程", "公司3", "機器學習", "api", "不存在"])
+def test_match_equals_substring_scan(data, term):
+    index = SearchIndex(data)
+    assert rows(index, index.match(None, term)) == brute_force(data, data.columns, term)
+
+def test_postings_are_sparse_or_dense(data):
+    index = SearchIndex(data)
+    assert "detail" not in index.postings
+    assert isinstance(index.postings["job"]["py"], int)
+    assert index.postings["job"]["99"].dtype == np.int32
+
+def test_query_combines_fields(data):
+    index = SearchIndex(data)
+    expected = (brute_force(data, ["job"], "python") & brute_force(data, ["detail"], "機器")) \
+        - brute_force(data, ["company"], "公司0")
+    assert rows(index, query_bits(index, "job:python & detail:機器 & !company:公司0")) == expected
+
+def test_query_cache_is_thread_safe(data):
+    from concurrent.futures import ThreadPoolExecutor
+    index = SearchIndex(data)
+    queries = [f"job:{i}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda query: query_bits(index, query, max_cached=4), queries))
+    assert results == [query_bits(index, query) for query in queries]
+    assert len(index.query_cache) <= 64
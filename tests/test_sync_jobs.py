@@ -0,0 +1,50 @@
+import datetime
+import pytest
+from utils.sync_jobs import sync_jobs
+
+mongomock = pytest.importorskip("mongomock")
+
+def make_job(job_id, name="工程師", apply_cnt=1):
+    return {"_id": job_id, "link": {"job": job_id}, "jobName": name, "applyCnt": apply_cnt}
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["104"]["jobs"]
+
+def at(day):
+    return datetime.datetime(2025, 1, day)
+
+def test_insert_update_unchanged_and_close(collection):
+    counts = sync_jobs(collection, [make_job("a"), make_job("b"), make_job("c")], now=at(1))
+    assert counts == {"inserted": 3, "updated": 0, "unchanged": 0, "closed": 0}
+
+    counts = sync_jobs(collection, [make_job("a"), make_job("b", name="資深工程師")], now=at(2))
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 1, "closed": 1}
+
+    assert collection.find_one({"_id": "b"})["jobName"] == "資深工程師"
+    closed = collection.find_one({"_id": "c"})
+    assert closed["closed"] is True
+    assert closed["closedAt"] == at(2)
+    assert closed["lastSeen"] == at(1)
+
+def test_reopen_preserves_first_seen(collection):
+    sync_jobs(collection, [make_job("a")], now=at(1))
+    sync_jobs(collection, [], now=at(2))
+    counts = sync_jobs(collection, [make_job("a")], now=at(3))
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 0, "closed": 0}
+
+    job = collection.find_one({"_id": "a"})
+    assert job["closed"] is False
+    assert "closedAt" not in job
+    assert job["firstSeen"] == at(1)
+    assert job["lastSeen"] == at(3)
+
+def test_unchanged_job_updates_last_seen_and_volatile_fields(collection):
+    sync_jobs(collection, [make_job("a", apply_cnt=1)], now=at(1))
+    counts = sync_jobs(collection, [make_job("a", apply_cnt=7)], now=at(2))
+    assert counts["unchanged"] == 1
+
+    job = collection.find_one({"_id": "a"})
+    assert job["applyCnt"] == 7
+    assert job["firstSeen"] == at(1)
+    assert job["lastSeen"] == at(2)